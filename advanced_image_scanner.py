@@ -1,5 +1,13 @@
 # Advanced AI Image Scanner (Optional Enhancement)
 # Requires: pip install opencv-python pillow scikit-image
+# Per-image work (resize, grayscale, 50x50x50 histogram, ORB keypoints and
+# descriptors) is computed once per image and cached on disk, so a
+# scan only compares cached features and one lost image can be scanned
+# against many found images in a single call.
+
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 import cv2
 import numpy as np
@@ -7,69 +15,154 @@ from PIL import Image
 import hashlib
 from skimage.metrics import structural_similarity as ssim
 
+from file_utils import atomic_write
+
+SCAN_SIZE = (300, 300)
+CACHE_FOLDER = os.path.join('instance', 'scanner_cache')
+# Bump when ScanFeatures changes, older cache files are then recomputed
+FEATURES_VERSION = 1
+
+# gray: 300x300 grayscale for SSIM
+# histogram: 50x50x50 BGR histogram (float32, as cv2.calcHist returns it)
+# keypoints: ORB keypoint count; descriptors: ORB descriptors or None
+# mean_color: per-channel mean of the resized image
+ScanFeatures = namedtuple('ScanFeatures', ['gray', 'histogram', 'keypoints', 'descriptors', 'mean_color'])
+
+def cache_path(img_path):
+    """Cache file of an image, named after its absolute path"""
+    key = hashlib.sha1(os.path.abspath(img_path).encode()).hexdigest()
+    return os.path.join(CACHE_FOLDER, key + '.npz')
+
+def compute_scan_features(img_path):
+    """ScanFeatures for an image file, None if it cannot be read"""
+    img = cv2.imread(img_path)
+    if img is None:
+        return None
+    
+    # Resize for comparison
+    resized = cv2.resize(img, SCAN_SIZE)
+    gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
+    histogram = cv2.calcHist([resized], [0, 1, 2], None, [50, 50, 50], [0, 256, 0, 256, 0, 256])
+    keypoints, descriptors = cv2.ORB_create().detectAndCompute(gray, None)
+    return ScanFeatures(gray, histogram, len(keypoints), descriptors, np.mean(resized, axis=(0, 1)))
+
+def scan_features(img_path):
+    """ScanFeatures for an image, from its cache file when that is newer than the image"""
+    path = cache_path(img_path)
+    try:
+        if os.path.getmtime(path) >= os.path.getmtime(img_path):
+            with np.load(path) as cached:
+                if int(cached['version']) == FEATURES_VERSION:
+                    descriptors = cached['descriptors'] if cached['has_descriptors'] else None
+                    return ScanFeatures(cached['gray'], cached['histogram'], int(cached['keypoints']),
+                                        descriptors, cached['mean_color'])
+    except (OSError, KeyError, ValueError):
+        pass
+    
+    features = compute_scan_features(img_path)
+    if features is None:
+        return None
+    
+    # Concurrent scans may cache the same image, a failed write only costs a recompute
+    try:
+        with atomic_write(path) as out:
+            np.savez_compressed(
+                out,
+                version=FEATURES_VERSION,
+                gray=features.gray,
+                histogram=features.histogram,
+                keypoints=features.keypoints,
+                has_descriptors=features.descriptors is not None,
+                descriptors=features.descriptors if features.descriptors is not None else np.zeros((0, 32), np.uint8),
+                mean_color=features.mean_color
+            )
+    except OSError:
+        pass
+    return features
+
+def compare_scan_features(features1, features2):
+    """advanced_image_scan result for two ScanFeatures"""
+    # 1. Structural Similarity Index (SSIM)
+    ssim_score = ssim(features1.gray, features2.gray)
+    
+    # 2. Histogram Comparison
+    hist_correlation = cv2.compareHist(features1.histogram, features2.histogram, cv2.HISTCMP_CORREL)
+    
+    # 3. Feature Matching (ORB)
+    feature_match_score = 0
+    if features1.descriptors is not None and features2.descriptors is not None:
+        bf = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
+        matches = bf.match(features1.descriptors, features2.descriptors)
+        feature_match_score = len(matches) / max(features1.keypoints, features2.keypoints)
+    
+    # 4. Color Analysis
+    color_diff = np.linalg.norm(features1.mean_color - features2.mean_color)
+    color_similarity = max(0, 1 - (color_diff / 255))
+    
+    # Combined AI Score
+    ai_score = (
+        ssim_score * 0.3 +
+        hist_correlation * 0.25 +
+        feature_match_score * 0.25 +
+        color_similarity * 0.2
+    ) * 100
+    
+    return {
+        "ai_percentage": round(ai_score, 2),
+        "ssim_score": round(ssim_score * 100, 2),
+        "histogram_match": round(hist_correlation * 100, 2),
+        "feature_matches": round(feature_match_score * 100, 2),
+        "color_similarity": round(color_similarity * 100, 2),
+        "technique": "Advanced Computer Vision"
+    }
+
 def advanced_image_scan(img1_path, img2_path):
     """
     Advanced AI image scanning techniques
+    
+    Pass the analysis copies of the uploads (image_features.analysis_path),
+    which are already close to the 300x300 working size.
     """
     try:
-        # Load images
-        img1 = cv2.imread(img1_path)
-        img2 = cv2.imread(img2_path)
+        # Load cached features, computing them on first use
+        features1 = scan_features(img1_path)
+        features2 = scan_features(img2_path)
         
-        if img1 is None or img2 is None:
+        if features1 is None or features2 is None:
             return {"error": "Could not load images"}
         
-        # Resize for comparison
-        img1_resized = cv2.resize(img1, (300, 300))
-        img2_resized = cv2.resize(img2, (300, 300))
-        
-        # 1. Structural Similarity Index (SSIM)
-        gray1 = cv2.cvtColor(img1_resized, cv2.COLOR_BGR2GRAY)
-        gray2 = cv2.cvtColor(img2_resized, cv2.COLOR_BGR2GRAY)
-        ssim_score = ssim(gray1, gray2)
-        
-        # 2. Histogram Comparison
-        hist1 = cv2.calcHist([img1_resized], [0, 1, 2], None, [50, 50, 50], [0, 256, 0, 256, 0, 256])
-        hist2 = cv2.calcHist([img2_resized], [0, 1, 2], None, [50, 50, 50], [0, 256, 0, 256, 0, 256])
-        hist_correlation = cv2.compareHist(hist1, hist2, cv2.HISTCMP_CORREL)
-        
-        # 3. Feature Matching (ORB)
-        orb = cv2.ORB_create()
-        kp1, des1 = orb.detectAndCompute(gray1, None)
-        kp2, des2 = orb.detectAndCompute(gray2, None)
-        
-        feature_match_score = 0
-        if des1 is not None and des2 is not None:
-            bf = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
-            matches = bf.match(des1, des2)
-            feature_match_score = len(matches) / max(len(kp1), len(kp2))
-        
-        # 4. Color Analysis
-        mean_color1 = np.mean(img1_resized, axis=(0, 1))
-        mean_color2 = np.mean(img2_resized, axis=(0, 1))
-        color_diff = np.linalg.norm(mean_color1 - mean_color2)
-        color_similarity = max(0, 1 - (color_diff / 255))
-        
-        # Combined AI Score
-        ai_score = (
-            ssim_score * 0.3 +
-            hist_correlation * 0.25 +
-            feature_match_score * 0.25 +
-            color_similarity * 0.2
-        ) * 100
-        
-        return {
-            "ai_percentage": round(ai_score, 2),
-            "ssim_score": round(ssim_score * 100, 2),
-            "histogram_match": round(hist_correlation * 100, 2),
-            "feature_matches": round(feature_match_score * 100, 2),
-            "color_similarity": round(color_similarity * 100, 2),
-            "technique": "Advanced Computer Vision"
-        }
-        
+        return compare_scan_features(features1, features2)
+    
     except Exception as e:
         return {"error": str(e)}
 
+def advanced_image_scan_many(lost_path, found_paths, workers=None):
+    """
+    advanced_image_scan of one lost image against many found images
+    
+    Results are in found_paths order. The lost image's features are loaded
+    once and the comparisons run on a thread pool (OpenCV releases the GIL
+    while matching), one worker per core by default.
+    """
+    try:
+        lost_features = scan_features(lost_path)
+        if lost_features is None:
+            return [{"error": "Could not load images"} for _ in found_paths]
+    except Exception as e:
+        return [{"error": str(e)} for _ in found_paths]
+    
+    def scan_one(found_path):
+        try:
+            found_features = scan_features(found_path)
+            if found_features is None:
+                return {"error": "Could not load images"}
+            return compare_scan_features(lost_features, found_features)
+        except Exception as e:
+            return {"error": str(e)}
+    
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        return list(pool.map(scan_one, found_paths))
+
 # Current basic technique for comparison
 def basic_file_scan(img1_path, img2_path):
     """
@@ -94,4 +187,4 @@ def basic_file_scan(img1_path, img2_path):
     return {
         "percentage": round(size_similarity, 2),
         "technique": "File Size Analysis"
-    }
\ No newline at end of file
+    }
@@ -1,15 +1,40 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, send_from_directory
+import click
+from flask import Flask, Response, g, has_app_context, make_response, stream_with_context, render_template, request, redirect, url_for, flash, session, jsonify, send_from_directory
 import sqlite3
 from datetime import datetime, timedelta
 import os
 from werkzeug.utils import secure_filename
 import re
+import json
+import math
+import heapq
+import multiprocessing
 from difflib import SequenceMatcher
 import random
+import time
+from functools import wraps
 import hashlib
 from werkzeug.security import generate_password_hash, check_password_hash
 from PIL import Image, ImageStat
 from dotenv import load_dotenv
+from match_index import CandidateIndex, lcs_length
+from text_features import TextFeatures, build_text_features, store_report_text, load_report_texts, keyword_tokens
+from lsh_index import index_report, candidate_reports
+from tfidf_matcher import tfidf_available, tfidf_pair_scores
+from match_engine import MatchProfile, register_scorer, stage
+from result_cache import ResultCache
+from image_index import index_image, load_image_hashes, near_image_pairs
+from color_index import index_colors, load_image_colors, near_color_pairs
+from image_features import (SCAN_SIZE, analysis_path, derive_analysis_image, compute_image_record,
+                            store_image_record, load_image_records)
+from image_kernel import kernel_available, overall_percentage_blocks
+from upload_store import save_upload, find_upload
+from image_worker import WorkerPool
+from scan_cache import load_scan, store_scan, purge_scans
+from feature_store import FeatureStore, store_available, load_store_rows, save_store_row
+from db_pool import ConnectionPool, connect, select_in
+from migrations import migrate
+from search_index import fts5_available, create_search_index, search_words, search_reports
 
 # Load environment variables
 load_dotenv()
@@ -48,26 +73,38 @@ def extract_keywords(text):
     keywords = [word for word in words if len(word) > 2 and word not in stop_words]
     return list(set(keywords))  # Remove duplicates
 
+def text_parts(text):
+    """Cleaned text and word set, from a raw string or precomputed TextFeatures"""
+    if isinstance(text, TextFeatures):
+        # Precomputed at write time, Jaccard works on interned token ids
+        return text.clean, text.token_ids
+    text_clean = re.sub(r'[^a-zA-Z0-9\s]', '', text.lower())
+    return text_clean, set(text_clean.split())
+
+def jaccard_similarity(words1, words2):
+    """Keyword overlap (Jaccard similarity)"""
+    if words1 and words2:
+        common = len(words1 & words2)
+        return common / (len(words1) + len(words2) - common)
+    return 0.0
+
 def calculate_nlp_text_similarity(text1, text2):
-    """Simple text similarity without ML dependencies"""
+    """Simple text similarity without ML dependencies
+
+    Accepts raw strings or precomputed TextFeatures (see text_features.py).
+    """
     try:
         if not text1 or not text2:
             return 0.0
         
         # Clean texts
-        text1_clean = re.sub(r'[^a-zA-Z0-9\s]', '', text1.lower())
-        text2_clean = re.sub(r'[^a-zA-Z0-9\s]', '', text2.lower())
+        text1_clean, words1 = text_parts(text1)
+        text2_clean, words2 = text_parts(text2)
         
         # Sequence similarity
         seq_sim = SequenceMatcher(None, text1_clean, text2_clean).ratio()
         
-        # Keyword overlap (Jaccard similarity)
-        words1 = set(text1_clean.split())
-        words2 = set(text2_clean.split())
-        if words1 and words2:
-            jaccard_sim = len(words1.intersection(words2)) / len(words1.union(words2))
-        else:
-            jaccard_sim = 0.0
+        jaccard_sim = jaccard_similarity(words1, words2)
         
         # Simple weighted similarity percentage
         nlp_score = (seq_sim * 0.6 + jaccard_sim * 0.4) * 100
@@ -78,12 +115,65 @@ def calculate_nlp_text_similarity(text1, text2):
         print(f"Text similarity error: {e}")
         return 0.0
 
+def bounded_text_similarity(text1, text2, min_score):
+    """calculate_nlp_text_similarity, or None when the pair cannot reach `min_score`
+
+    SequenceMatcher.ratio() is quadratic, so it only runs once cheaper upper
+    bounds on it (length ratio, then longest common subsequence) say the
+    pair can still reach `min_score` together with the exact Jaccard part.
+    """
+    if min_score <= 0:
+        return calculate_nlp_text_similarity(text1, text2)
+    if not text1 or not text2:
+        return None
+    
+    try:
+        text1_clean, words1 = text_parts(text1)
+        text2_clean, words2 = text_parts(text2)
+        jaccard_sim = jaccard_similarity(words1, words2)
+        
+        def reachable(seq_bound):
+            # 0.01 covers the rounding in calculate_nlp_text_similarity
+            return (seq_bound * 0.6 + jaccard_sim * 0.4) * 100 + 0.01 >= min_score
+        
+        total = len(text1_clean) + len(text2_clean)
+        if total == 0:
+            return calculate_nlp_text_similarity(text1, text2)
+        
+        if not reachable(2.0 * min(len(text1_clean), len(text2_clean)) / total):
+            return None
+        if not reachable(2.0 * lcs_length(text1_clean, text2_clean) / total):
+            return None
+        
+        seq_sim = SequenceMatcher(None, text1_clean, text2_clean).ratio()
+        nlp_score = (seq_sim * 0.6 + jaccard_sim * 0.4) * 100
+        return round(max(0, min(100, nlp_score)), 2)
+        
+    except Exception as e:
+        print(f"Text similarity error: {e}")
+        return 0.0
+
 def extract_identification_details(description):
     """Extract identification details from description"""
     if '| IDENTIFICATION:' not in description:
         return ''
     return description.split('| IDENTIFICATION:')[1].strip()
 
+# Key identification markers
+ID_MARKERS = {
+    'serial': ['serial', 'number', 'imei', 'model'],
+    'physical': ['scratch', 'dent', 'crack', 'mark', 'sticker'],
+    'color': ['red', 'blue', 'green', 'black', 'white', 'brown', 'gray'],
+    'brand': ['apple', 'samsung', 'nike', 'sony', 'hp', 'dell'],
+    'size': ['small', 'large', 'medium', 'big', 'tiny']
+}
+
+def identification_markers(id_text):
+    """Marker categories mentioned in identification details"""
+    id_lower = id_text.lower()
+    return {category for category, keywords in ID_MARKERS.items()
+            if any(word in id_lower for word in keywords)}
+
 def calculate_identification_match(lost_desc, found_desc):
     """Calculate match probability based on identification details"""
     lost_id = extract_identification_details(lost_desc)
@@ -92,31 +182,34 @@ def calculate_identification_match(lost_desc, found_desc):
     if not lost_id or not found_id:
         return 0.0
     
-    # Key identification markers
-    id_markers = {
-        'serial': ['serial', 'number', 'imei', 'model'],
-        'physical': ['scratch', 'dent', 'crack', 'mark', 'sticker'],
-        'color': ['red', 'blue', 'green', 'black', 'white', 'brown', 'gray'],
-        'brand': ['apple', 'samsung', 'nike', 'sony', 'hp', 'dell'],
-        'size': ['small', 'large', 'medium', 'big', 'tiny']
-    }
-    
-    match_score = 0.0
-    total_categories = 0
-    
-    for category, keywords in id_markers.items():
-        lost_has = any(word in lost_id.lower() for word in keywords)
-        found_has = any(word in found_id.lower() for word in keywords)
-        
-        if lost_has or found_has:
-            total_categories += 1
-            if lost_has and found_has:
-                # Check for specific matches within category
-                category_match = calculate_nlp_text_similarity(lost_id, found_id)
-                match_score += category_match
+    return identification_similarity(
+        lost_id, found_id, identification_markers(lost_id), identification_markers(found_id)
+    )
+
+def identification_similarity(lost_id, found_id, lost_markers, found_markers, min_score=0):
+    """Marker-weighted similarity of two identification texts (raw or TextFeatures)
+
+    With `min_score` set, returns None as soon as the score cannot reach it.
+    """
+    total_categories = len(set(lost_markers) | set(found_markers))
     
     if total_categories == 0:
-        return calculate_nlp_text_similarity(lost_id, found_id)
+        return bounded_text_similarity(lost_id, found_id, min_score)
+    
+    shared = [category for category in ID_MARKERS
+              if category in lost_markers and category in found_markers]
+    if not shared:
+        return 0.0 if min_score <= 0 else None
+    
+    # Every category both sides mention counts the same text similarity
+    category_match = bounded_text_similarity(
+        lost_id, found_id, min_score * total_categories / len(shared)
+    )
+    if category_match is None:
+        return None
+    match_score = 0.0
+    for category in shared:
+        match_score += category_match
     
     return min(100, match_score / total_categories)
 
@@ -248,11 +341,122 @@ def calculate_urgency_score(date_reported, item_type):
 # Database file
 DATABASE = 'lost_found.db'
 
+# Connections borrowed by requests, see db_pool
+db_pool = ConnectionPool(DATABASE, app.config['DB_POOL_SIZE'], app.config['DB_BUSY_TIMEOUT'])
+
 def get_db_connection():
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
+    """The request's pooled connection, or a new one outside a request
+
+    Within a request every call returns the same connection, conn.close()
+    only gives it back and it returns to the pool at teardown. Background
+    threads and worker processes get a connection of their own.
+    """
+    if not has_app_context():
+        return connect(DATABASE, app.config['DB_BUSY_TIMEOUT'])
+    conn = g.get('db_conn')
+    if conn is None:
+        conn = g.db_conn = db_pool.acquire()
+    conn.borrowers += 1
     return conn
 
+@app.teardown_appcontext
+def release_db_connection(exception):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        db_pool.release(conn)
+
+def get_data_version(conn):
+    row = conn.execute("SELECT version FROM data_version WHERE id = 1").fetchone()
+    return row['version'] if row else 0
+
+def bump_data_version(conn):
+    """Invalidate cached responses for writes the reports triggers do not see"""
+    conn.execute("UPDATE data_version SET version = version + 1 WHERE id = 1")
+
+# Responses of read-only endpoints, keyed on (path, query, data version)
+result_cache = ResultCache(app.config['RESULT_CACHE_SIZE'])
+
+def cached_by_data_version(view):
+    """Serve repeat requests from result_cache until the data version changes
+
+    Streamed (NDJSON) and non-200 responses are never cached.
+    """
+    @wraps(view)
+    def cached_view(*args, **kwargs):
+        if wants_ndjson():
+            return view(*args, **kwargs)
+        
+        conn = get_db_connection()
+        version = get_data_version(conn)
+        conn.close()
+        key = (request.path, tuple(sorted(request.args.items(multi=True))), version)
+        
+        computed = []
+        def compute():
+            response = make_response(view(*args, **kwargs))
+            computed.append(response)
+            if response.status_code != 200 or response.is_streamed:
+                return None
+            headers = {name: value for name, value in response.headers if name.startswith('X-')}
+            return response.get_data(), response.mimetype, headers
+        
+        cached = result_cache.get_or_compute(key, compute)
+        if computed:
+            return computed[0]
+        if cached is None:
+            return view(*args, **kwargs)
+        body, mimetype, headers = cached
+        return Response(body, mimetype=mimetype, headers=headers)
+    return cached_view
+
+# Keyset pagination of report, notification and reward lists
+# Pages follow (sort column, id) from the last row sent, so each page is one
+# index range read however deep the client has scrolled, and rows inserted
+# meanwhile do not shift later pages.
+
+def page_size():
+    """?limit= clamped to 1..MAX_PAGE_SIZE, PAGE_SIZE by default"""
+    limit = request.args.get('limit', app.config['PAGE_SIZE'], type=int)
+    return min(max(limit, 1), app.config['MAX_PAGE_SIZE'])
+
+def encode_row_cursor(sort_value, row_id):
+    """Opaque keyset position after one row"""
+    return f"{row_id}:{sort_value}"
+
+def decode_row_cursor(cursor):
+    """(sort_value, id) from a cursor, ValueError if malformed"""
+    row_id, sort_value = cursor.split(':', 1)
+    return sort_value, int(row_id)
+
+def keyset_page(conn, table, where, params, sort_column, cursor=None, limit=None, descending=True):
+    """(rows, next_cursor) for one page of `table` rows matching `where`
+
+    Rows are ordered by (sort_column, id), newest first unless `descending`
+    is off; next_cursor is None on the last page.
+    """
+    limit = limit or page_size()
+    params = list(params)
+    if cursor:
+        where += f" AND ({sort_column}, id) {'<' if descending else '>'} (?, ?)"
+        params += decode_row_cursor(cursor)
+    direction = 'DESC' if descending else 'ASC'
+    rows = conn.execute(f"""
+        SELECT * FROM {table} WHERE {where}
+        ORDER BY {sort_column} {direction}, id {direction}
+        LIMIT ?
+    """, params + [limit + 1]).fetchall()
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_row_cursor(last[sort_column], last['id'])
+
+def valid_cursor(cursor):
+    try:
+        cursor and decode_row_cursor(cursor)
+    except ValueError:
+        return False
+    return True
+
 def init_db():
     conn = get_db_connection()
     
@@ -285,14 +489,6 @@ def init_db():
         )
     ''')
     
-    # Add image_filename column if it doesn't exist (for existing databases)
-    try:
-        conn.execute('ALTER TABLE reports ADD COLUMN image_filename TEXT')
-        conn.commit()
-    except sqlite3.OperationalError:
-        # Column already exists, ignore the error
-        pass
-    
     conn.execute('''
         CREATE TABLE IF NOT EXISTS notifications (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -318,7 +514,184 @@ def init_db():
         )
     ''')
     
-
+    # Interned tokens and per-report text features (see text_features.py)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS tokens (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            token TEXT UNIQUE NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS report_text (
+            report_id INTEGER NOT NULL,
+            field TEXT NOT NULL,
+            clean_text TEXT NOT NULL,
+            token_ids BLOB NOT NULL,
+            keyword_ids BLOB NOT NULL,
+            tags TEXT NOT NULL DEFAULT '',
+            PRIMARY KEY (report_id, field)
+        )
+    ''')
+    
+    # MinHash signatures and LSH buckets for duplicate lookups (see lsh_index.py)
+    lsh_exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'lsh_buckets'"
+    ).fetchone()
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS report_minhash (
+            report_id INTEGER PRIMARY KEY,
+            signature BLOB NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS lsh_buckets (
+            band INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            report_id INTEGER NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_lsh_buckets_band_bucket
+        ON lsh_buckets (band, bucket)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_lsh_buckets_report
+        ON lsh_buckets (report_id)
+    ''')
+    if not lsh_exists:
+        for report in conn.execute("SELECT id, item_name, description FROM reports").fetchall():
+            index_report(conn, report['id'], report['item_name'], report['description'])
+    
+    # Full-text index of report text, kept in sync by triggers (see search_index.py)
+    create_search_index(conn)
+    
+    # Perceptual hashes of report images (see image_index.py)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS image_hashes (
+            report_id INTEGER PRIMARY KEY,
+            dhash INTEGER NOT NULL,
+            phash INTEGER NOT NULL
+        )
+    ''')
+    
+    # Dominant colours of report images (see color_index.py)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS image_colors (
+            report_id INTEGER NOT NULL,
+            rank INTEGER NOT NULL,
+            r INTEGER NOT NULL,
+            g INTEGER NOT NULL,
+            b INTEGER NOT NULL,
+            share REAL NOT NULL,
+            PRIMARY KEY (report_id, rank)
+        )
+    ''')
+    
+    # Content-addressed uploads (see upload_store.py)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS uploads (
+            sha256 TEXT PRIMARY KEY,
+            filename TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_reports_image_filename
+        ON reports (image_filename)
+    ''')
+    
+    # Image scan results by content hashes (see scan_cache.py)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS scan_cache (
+            lost_hash BLOB NOT NULL,
+            found_hash BLOB NOT NULL,
+            scanner_version INTEGER NOT NULL,
+            result TEXT NOT NULL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (lost_hash, found_hash, scanner_version)
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_scan_cache_last_used
+        ON scan_cache (last_used)
+    ''')
+    purge_scans(conn, IMAGE_SCANNER_VERSION)
+    
+    # Rows of the memory-mapped image feature stores (see feature_store.py)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS image_store_rows (
+            report_id INTEGER PRIMARY KEY,
+            row INTEGER NOT NULL
+        )
+    ''')
+    
+    # Background image processing status per report (see process_report_image)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS image_jobs (
+            report_id INTEGER PRIMARY KEY,
+            status TEXT CHECK(status IN ('pending', 'processing', 'done', 'failed')) NOT NULL,
+            error TEXT,
+            updated_at TIMESTAMP
+        )
+    ''')
+    
+    # Packed per-image feature records (see image_features.py)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS image_features (
+            report_id INTEGER PRIMARY KEY,
+            record BLOB NOT NULL
+        )
+    ''')
+    
+    # Data version, bumped on every write to reports (see cached_by_data_version)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)")
+    for event in ('INSERT', 'UPDATE', 'DELETE'):
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS reports_version_{event.lower()}
+            AFTER {event} ON reports
+            BEGIN
+                UPDATE data_version SET version = version + 1 WHERE id = 1;
+            END
+        ''')
+    
+    # Scored lost/found pairs, one row per matcher (see update_matches_for_report)
+    matches_exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'matches'"
+    ).fetchone()
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS matches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            lost_report_id INTEGER NOT NULL,
+            found_report_id INTEGER NOT NULL,
+            match_kind TEXT NOT NULL,
+            similarity_score REAL NOT NULL,
+            image_similarity REAL DEFAULT 0.0,
+            text_similarity REAL DEFAULT 0.0,
+            details TEXT NOT NULL,
+            status TEXT CHECK(status IN ('pending', 'confirmed', 'rejected')) DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(lost_report_id, found_report_id, match_kind)
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_matches_kind_score
+        ON matches (match_kind, similarity_score DESC)
+    ''')
+    conn.commit()
+    
+    # Column changes and indexes on existing tables (see migrations.py)
+    migrate(conn)
+    
+    # Existing reports are scored offline, not on import
+    if not matches_exists and conn.execute("SELECT 1 FROM reports LIMIT 1").fetchone():
+        print("Matches table created, run `flask rebuild-matches` to score the existing reports")
     
     conn.commit()
     conn.close()
@@ -434,13 +807,30 @@ def my_notifications():
 def notification_history():
     email = session.get('user_email', '')
     
+    cursor = request.args.get('cursor')
+    if not valid_cursor(cursor):
+        return redirect(url_for('notification_history'))
+    
     conn = get_db_connection()
-    # Show all notifications (read and unread)
-    notifications_raw = conn.execute("SELECT * FROM notifications WHERE user_email = ? ORDER BY created_at DESC", (email,)).fetchall()
+    # Show all notifications (read and unread), a page at a time
+    notifications_raw, next_cursor = keyset_page(conn, 'notifications', 'user_email = ?', (email,), 'created_at', cursor)
     notifications = [dict(notification) for notification in notifications_raw]
+    total = conn.execute("SELECT COUNT(*) as count FROM notifications WHERE user_email = ?", (email,)).fetchone()['count']
+    
+    # Every page offers the reward from the user's first reward notification
+    reward_info = {}
+    reward = conn.execute("""
+        SELECT message FROM notifications
+        WHERE user_email = ? AND title = 'REWARD_INFO' AND message LIKE 'REWARD_DATA:%'
+        ORDER BY created_at, id LIMIT 1
+    """, (email,)).fetchone()
+    if reward:
+        reward_data = reward['message'].replace('REWARD_DATA:', '').split('|')
+        reward_info[email] = {'email': reward_data[0], 'name': reward_data[1], 'item': reward_data[2]}
     conn.close()
     
-    return render_template('notification_history.html', notifications=notifications, user_email=email)
+    return render_template('notification_history.html', notifications=notifications, total=total,
+                           reward_info=reward_info, next_cursor=next_cursor, user_email=email)
 
 @app.route('/live_feed')
 def live_feed():
@@ -508,13 +898,17 @@ def quick_search():
         return jsonify([])
     
     conn = get_db_connection()
-    results = conn.execute("""
-        SELECT * FROM reports 
-        WHERE (LOWER(item_name) LIKE ? OR LOWER(description) LIKE ? OR LOWER(location) LIKE ?)
-        AND status = 'active'
-        ORDER BY date_reported DESC 
-        LIMIT 20
-    """, (f'%{query}%', f'%{query}%', f'%{query}%')).fetchall()
+    if fts5_available():
+        # Every word, as a prefix, in any of the three fields
+        results = search_reports(conn, search_words(query), 20, active_only=True)
+    else:
+        results = conn.execute("""
+            SELECT * FROM reports 
+            WHERE (LOWER(item_name) LIKE ? OR LOWER(description) LIKE ? OR LOWER(location) LIKE ?)
+            AND status = 'active'
+            ORDER BY date_reported DESC 
+            LIMIT 20
+        """, (f'%{query}%', f'%{query}%', f'%{query}%')).fetchall()
     
     conn.close()
     return jsonify([dict(result) for result in results])
@@ -737,20 +1131,17 @@ def report_lost():
         
         # Handle image upload and feature extraction
         image_filename = None
-        image_features = None
+        upload = None
         if 'image' in request.files:
             file = request.files['image']
             if file and file.filename != '' and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_')
-                image_filename = timestamp + filename
-                image_path = os.path.join(app.config['UPLOAD_FOLDER'], image_filename)
-                file.save(image_path)
-                
-                # Extract image features for AI matching
-                features = extract_image_features(image_path)
-                if features:
-                    image_features = str(features)
+                # Stored under its content hash, computed while it is written
+                upload = save_upload(conn, file, app.config['UPLOAD_FOLDER'])
+                image_filename = upload.filename
+                if upload.duplicate:
+                    duplicate = detect_duplicate_image(conn, upload.sha256)
+                    if duplicate['is_duplicate']:
+                        flash(f"This photo was already uploaded with report #{duplicate['report_id']}", 'warning')
         
 
         
@@ -760,7 +1151,7 @@ def report_lost():
         if not image_filename and specific_identification:
             final_description += f" | IDENTIFICATION: {specific_identification}"
         
-        conn.execute("""
+        cursor = conn.execute("""
             INSERT INTO reports (name, email, phone, item_name, description, location, image_filename, date_reported, type)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
@@ -774,6 +1165,17 @@ def report_lost():
             datetime.now(),
             'lost'
         ))
+        report = conn.execute("SELECT * FROM reports WHERE id = ?", (cursor.lastrowid,)).fetchone()
+        save_report_text(conn, report)
+        index_report(conn, report['id'], report['item_name'], report['description'])
+        conn.commit()
+        
+        if upload:
+            # Image features and image matches are computed off the request thread
+            submit_image_job(conn, report['id'])
+        else:
+            # Score the new report against the opposite type once, here
+            update_matches_for_report(conn, report['id'])
         
 
         
@@ -822,20 +1224,17 @@ def report_found():
         
         # Handle image upload and feature extraction
         image_filename = None
-        image_features = None
+        upload = None
         if 'image' in request.files:
             file = request.files['image']
             if file and file.filename != '' and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_')
-                image_filename = timestamp + filename
-                image_path = os.path.join(app.config['UPLOAD_FOLDER'], image_filename)
-                file.save(image_path)
-                
-                # Extract image features for AI matching
-                features = extract_image_features(image_path)
-                if features:
-                    image_features = str(features)
+                # Stored under its content hash, computed while it is written
+                upload = save_upload(conn, file, app.config['UPLOAD_FOLDER'])
+                image_filename = upload.filename
+                if upload.duplicate:
+                    duplicate = detect_duplicate_image(conn, upload.sha256)
+                    if duplicate['is_duplicate']:
+                        flash(f"This photo was already uploaded with report #{duplicate['report_id']}", 'warning')
         
         # Get specific identification if no image uploaded
         specific_identification = request.form.get('specific_identification', '')
@@ -843,7 +1242,7 @@ def report_found():
         if not image_filename and specific_identification:
             final_description += f" | IDENTIFICATION: {specific_identification}"
         
-        conn.execute("""
+        cursor = conn.execute("""
             INSERT INTO reports (name, email, phone, item_name, description, location, image_filename, date_reported, type)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, (
@@ -857,6 +1256,17 @@ def report_found():
             datetime.now(),
             'found'
         ))
+        report = conn.execute("SELECT * FROM reports WHERE id = ?", (cursor.lastrowid,)).fetchone()
+        save_report_text(conn, report)
+        index_report(conn, report['id'], report['item_name'], report['description'])
+        conn.commit()
+        
+        if upload:
+            # Image features and image matches are computed off the request thread
+            submit_image_job(conn, report['id'])
+        else:
+            # Score the new report against the opposite type once, here
+            update_matches_for_report(conn, report['id'])
         
         conn.commit()
         conn.close()
@@ -872,21 +1282,61 @@ def report_found():
 def my_reports():
     email = session.get('user_email', '')
     
+    cursor = request.args.get('cursor')
+    if not valid_cursor(cursor):
+        return redirect(url_for('my_reports'))
+    
     conn = get_db_connection()
-    reports_raw = conn.execute("SELECT * FROM reports WHERE email = ? ORDER BY date_reported DESC", (email,)).fetchall()
+    reports_raw, next_cursor = keyset_page(conn, 'reports', 'email = ?', (email,), 'date_reported', cursor)
     reports = [dict(report) for report in reports_raw]
+    counts = conn.execute("""
+        SELECT COUNT(*) as total,
+               COALESCE(SUM(CASE WHEN type = 'lost' THEN 1 ELSE 0 END), 0) as lost,
+               COALESCE(SUM(CASE WHEN type = 'found' THEN 1 ELSE 0 END), 0) as found
+        FROM reports WHERE email = ?
+    """, (email,)).fetchone()
     
     conn.close()
     
-    return render_template('my_reports.html', reports=reports, user_email=email)
+    return render_template('my_reports.html', reports=reports, counts=dict(counts),
+                           next_cursor=next_cursor, user_email=email)
 
 @app.route('/admin_reports')
+@cached_by_data_version
 def admin_reports():
+    """Reports a page at a time, newest first (?order=asc for oldest first)
+
+    ?limit= sets the page size and ?cursor= continues after a page; the
+    cursor of the next page is in X-Next-Cursor until the last page.
+    """
+    cursor = request.args.get('cursor')
+    if not valid_cursor(cursor):
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
     conn = get_db_connection()
-    reports = conn.execute("SELECT * FROM reports ORDER BY date_reported DESC").fetchall()
+    reports, next_cursor = keyset_page(conn, 'reports', '1', (), 'date_reported', cursor,
+                                       descending=request.args.get('order') != 'asc')
     conn.close()
     
-    return jsonify([dict(report) for report in reports])
+    response = jsonify([dict(report) for report in reports])
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+@app.route('/admin_report_counts')
+@cached_by_data_version
+def admin_report_counts():
+    """Lost, found and resolved report totals for the admin dashboard"""
+    conn = get_db_connection()
+    counts = conn.execute("""
+        SELECT COALESCE(SUM(CASE WHEN type = 'lost' THEN 1 ELSE 0 END), 0) as lost,
+               COALESCE(SUM(CASE WHEN type = 'found' THEN 1 ELSE 0 END), 0) as found,
+               COALESCE(SUM(CASE WHEN status = 'resolved' THEN 1 ELSE 0 END), 0) as resolved
+        FROM reports
+    """).fetchone()
+    conn.close()
+    
+    return jsonify(dict(counts))
 
 def simple_image_similarity(img1_path, img2_path):
     """Basic file comparison for images"""
@@ -913,77 +1363,812 @@ def simple_image_similarity(img1_path, img2_path):
     except:
         return 0.0
 
-@app.route('/find_matches')
-def find_matches():
+def image_record_similarity(record1, record2):
+    """simple_image_similarity on precomputed image records"""
+    if record1.content_hash == record2.content_hash:
+        return 100.0
+    
+    # Basic file size comparison
+    size_diff = abs(record1.size - record2.size)
+    max_size = max(record1.size, record2.size)
+    
+    if max_size > 0:
+        similarity = max(0, 100 - (size_diff / max_size * 100))
+        return round(similarity, 1)
+    
+    return 0.0
+
+# Precomputed report text
+# Fields the NLP scorers read, stored per report by store_report_text at write time
+REPORT_TEXT_FIELDS = ('combined', 'item', 'description', 'identification', 'searchable')
+
+def report_texts(report):
+    """Raw strings and identification markers behind REPORT_TEXT_FIELDS"""
+    identification = extract_identification_details(report['description'])
+    texts = {
+        'combined': f"{report['item_name']} {report['description']}",
+        'item': report['item_name'],
+        'description': report['description'],
+        'identification': identification,
+        'searchable': f"{report['item_name']} {report['description']} {report['location']}"
+    }
+    tags = {'identification': identification_markers(identification)} if identification else {}
+    return texts, tags
+
+def save_report_text(conn, report):
+    """Compute and store a report's text features"""
+    texts, tags = report_texts(report)
+    return store_report_text(conn, report['id'], texts, tags)
+
+def get_report_texts(conn, reports):
+    """{report_id: {field: TextFeatures}}, filling in reports stored before features existed"""
+    texts = load_report_texts(conn, [report['id'] for report in reports], REPORT_TEXT_FIELDS)
+    for report in reports:
+        if report['id'] not in texts:
+            texts[report['id']] = save_report_text(conn, report)
+    return texts
+
+def text_identification_match(lost_text, found_text, min_score=0):
+    """calculate_identification_match on precomputed identification text"""
+    lost_id = lost_text['identification']
+    found_id = found_text['identification']
+    if not lost_id or not found_id:
+        return 0.0 if min_score <= 0 else None
+    return identification_similarity(lost_id, found_id, lost_id.tags, found_id.tags, min_score)
+
+# Persisted matches
+# Each report is scored once against the opposite type when it is filed and the
+# results are kept in the matches table, so the match routes are plain reads.
+MATCH_KINDS = ('standard', 'identification', 'enhanced', 'image')
+
+# Match engine scorers (see match_engine.py)
+# Scorers read report rows and the precomputed text in the pair context
+
+def upload_path(report):
+    """Upload path of a report's image, or None when it has none on disk"""
+    if not report['image_filename']:
+        return None
+    path = os.path.join(app.config['UPLOAD_FOLDER'], report['image_filename'])
+    return path if os.path.exists(path) else None
+
+def index_report_image(conn, report_id, image_filename):
+    """Perceptual hashes, dominant colours and feature record for a newly uploaded report image
+
+    A duplicate upload copies them from a report that already has the same file.
+    """
+    source = conn.execute("""
+        SELECT h.report_id FROM reports r
+        JOIN image_hashes h ON h.report_id = r.id
+        JOIN image_features f ON f.report_id = r.id
+        WHERE r.image_filename = ? AND r.id != ?
+        LIMIT 1
+    """, (image_filename, report_id)).fetchone()
+    if source:
+        conn.execute("""
+            INSERT OR REPLACE INTO image_hashes (report_id, dhash, phash)
+            SELECT ?, dhash, phash FROM image_hashes WHERE report_id = ?
+        """, (report_id, source['report_id']))
+        conn.execute("""
+            INSERT OR REPLACE INTO image_features (report_id, record)
+            SELECT ?, record FROM image_features WHERE report_id = ?
+        """, (report_id, source['report_id']))
+        conn.execute("""
+            INSERT OR REPLACE INTO image_colors (report_id, rank, r, g, b, share)
+            SELECT ?, rank, r, g, b, share FROM image_colors WHERE report_id = ?
+        """, (report_id, source['report_id']))
+        return
+    
+    # The upload store already knows the content hash and size
+    upload = conn.execute("SELECT sha256, size FROM uploads WHERE filename = ?", (image_filename,)).fetchone()
+    image_path = os.path.join(app.config['UPLOAD_FOLDER'], image_filename)
+    pixels_path = analysis_image(image_path)
+    if pixels_path:
+        index_image(conn, report_id, pixels_path)
+        index_colors(conn, report_id, pixels_path)
+        store_image_record(conn, report_id, image_path, pixels_path,
+                           bytes.fromhex(upload['sha256']) if upload else None,
+                           upload['size'] if upload else None)
+
+def set_image_status(conn, report_id, status, error=None):
+    conn.execute("""
+        INSERT OR REPLACE INTO image_jobs (report_id, status, error, updated_at) VALUES (?, ?, ?, ?)
+    """, (report_id, status, error, datetime.now()))
+
+def claim_image_job(conn, report_id):
+    """Move a pending job to processing, False when another worker already took it"""
+    claimed = conn.execute("""
+        UPDATE image_jobs SET status = 'processing', error = NULL, updated_at = ?
+        WHERE report_id = ? AND status = 'pending'
+    """, (datetime.now(), report_id)).rowcount
+    conn.commit()
+    return claimed > 0
+
+def process_report_image(report_id):
+    """Image job: index the report's image, then score the report
+
+    Only the worker that claims the pending job runs it. Failures are
+    recorded on the job and never raised.
+    """
+    conn = get_db_connection()
     try:
-        conn = get_db_connection()
-        lost_items = conn.execute("SELECT * FROM reports WHERE type = 'lost'").fetchall()
-        found_items = conn.execute("SELECT * FROM reports WHERE type = 'found'").fetchall()
+        if not claim_image_job(conn, report_id):
+            return
+        report = conn.execute("SELECT * FROM reports WHERE id = ?", (report_id,)).fetchone()
+        if not report or not report['image_filename']:
+            set_image_status(conn, report_id, 'failed', 'Report has no image')
+            conn.commit()
+            return
+        
+        index_report_image(conn, report_id, report['image_filename'])
+        get_match_images(conn, [report])
+        conn.commit()
         
-        matches = []
+        # Score the new report against the opposite type once its image features exist
+        update_matches_for_report(conn, report_id)
+        set_image_status(conn, report_id, 'done')
+        conn.commit()
+    except Exception as e:
+        print(f"Image job error for report {report_id}: {e}")
+        conn.rollback()
+        set_image_status(conn, report_id, 'failed', str(e))
+        conn.commit()
+    finally:
+        conn.close()
+
+image_pool = WorkerPool(process_report_image, app.config['IMAGE_WORKERS'], app.config['IMAGE_QUEUE_SIZE'])
+
+def submit_image_job(conn, report_id):
+    """Queue a report's image job, processing it here when the pool is full or disabled"""
+    set_image_status(conn, report_id, 'pending')
+    conn.commit()
+    if not image_pool.submit(report_id):
+        process_report_image(report_id)
+
+def analysis_image(path):
+    """Analysis copy of an uploaded image (see image_features.py), derived on first use
+
+    Returns None when the upload cannot be decoded.
+    """
+    pixels_path = analysis_path(path)
+    if os.path.exists(pixels_path):
+        return pixels_path
+    try:
+        return derive_analysis_image(path)
+    except (OSError, ValueError):
+        return None
+
+@register_scorer('text', cost=2)
+def text_scorer(lost, found, context, min_score, field='combined', fraction=False):
+    """NLP text similarity of one precomputed field, 0-100 or 0-1 with `fraction`"""
+    score = bounded_text_similarity(
+        context['lost_text'][field], context['found_text'][field],
+        min_score * 100 if fraction else min_score
+    )
+    if score is None or not fraction:
+        return score
+    return score / 100
+
+@register_scorer('identification', cost=3)
+def identification_scorer(lost, found, context, min_score):
+    return text_identification_match(context['lost_text'], context['found_text'], min_score)
+
+@register_scorer('location', cost=1, max_score=1.0)
+def location_scorer(lost, found, context, min_score):
+    return calculate_location_similarity(lost['location'], found['location'])
+
+@register_scorer('image_file', cost=5)
+def image_file_scorer(lost, found, context, min_score):
+    """File hash / size comparison"""
+    lost_image = context.get('lost_image')
+    found_image = context.get('found_image')
+    if not lost_image or not found_image:
+        return 0.0
+    return image_record_similarity(lost_image, found_image)
+
+@register_scorer('image', cost=10)
+def image_scorer(lost, found, context, min_score):
+    """Computer vision scan on the stored image records"""
+    lost_image = context.get('lost_image')
+    found_image = context.get('found_image')
+    if not lost_image or not found_image:
+        return None
+    if context.get('image_percentage') is not None:
+        return context['image_percentage']
+    return image_record_scan(lost_image, found_image)['overall_percentage']
+
+# Profile filters and stage conditions
+
+def different_reporters(lost, found, context):
+    # Skip if same user reported both items
+    return lost['email'] != found['email']
+
+def has_identification_only(report):
+    """Report without an image that carries identification details"""
+    return not report['image_filename'] and '| IDENTIFICATION:' in report['description']
+
+def identification_only(lost, found, context):
+    return has_identification_only(lost) and has_identification_only(found)
+
+def both_images(lost, found, context=None):
+    return bool(lost['image_filename'] and found['image_filename'])
+
+def no_images(lost, found):
+    return not lost['image_filename'] and not found['image_filename']
+
+# Result builders
+
+def standard_result(lost, found, context, scores, final):
+    """find_matches result: image, then identification, then text"""
+    image_percentage = scores.get('image', 0.0)
+    identification_percentage = scores.get('identification', 0.0)
+    
+    # Text similarity is reported even when an earlier stage decided the pair
+    text_score = scores['text'] if 'text' in scores else text_scorer(lost, found, context, 0)
+    text_percentage = (text_score / 100) * 100
+    
+    if image_percentage > 0:
+        final_percentage = image_percentage
+        match_type = 'Image-Based'
+    elif identification_percentage > 0:
+        final_percentage = identification_percentage
+        match_type = 'ID-Based'
+    else:
+        final_percentage = text_percentage
+        match_type = 'Text-Based'
+        if final_percentage < 30:
+            return None
+    
+    if final_percentage >= 80:
+        level = 'High Match'
+    elif final_percentage >= 60:
+        level = 'Medium Match'
+    else:
+        level = 'Low Match'
+    
+    return {
+        'match_score': f'{level} - {final_percentage:.1f}%',
+        'similarity': final_percentage / 100,
+        'image_similarity': image_percentage,
+        'identification_similarity': identification_percentage,
+        'text_similarity': text_percentage,
+        'match_type': match_type
+    }
+
+def identification_result(lost, found, context, scores, combined_score):
+    """find_identification_matches result (70% identification, 30% item name)"""
+    if combined_score >= 70:
+        match_level = 'High ID Match'
+        urgency = 'HIGH'
+    elif combined_score >= 50:
+        match_level = 'Medium ID Match'
+        urgency = 'MEDIUM'
+    else:
+        match_level = 'Possible ID Match'
+        urgency = 'LOW'
+    
+    return {
+        'match_score': f'{match_level} - {combined_score:.1f}%',
+        'similarity': combined_score / 100,
+        'identification_match': scores['identification'],
+        'item_match': scores['item'],
+        'urgency': urgency,
+        'match_type': 'Identification-Based'
+    }
+
+def enhanced_result(lost, found, context, scores, overall_similarity):
+    """enhanced_matches result: weighted name, description and location"""
+    return {
+        'similarity': overall_similarity,
+        'location_match': scores['location'] > 0.6,
+        'match_score': f'{int(overall_similarity * 100)}% Match'
+    }
+
+def image_result(lost, found, context, scores, percentage):
+    """ai_find_matches result from the computer vision scan"""
+    if percentage >= 80:
+        match_level = 'Excellent Match'
+        urgency = 'HIGH'
+    elif percentage >= 60:
+        match_level = 'Good Match'
+        urgency = 'MEDIUM'
+    elif percentage >= 30:
+        match_level = 'Fair Match'
+        urgency = 'LOW'
+    else:
+        match_level = 'Weak Match'
+        urgency = 'LOW'
+    
+    return {
+        'match_score': f'{match_level} - {percentage:.1f}%',
+        'similarity': percentage / 100,
+        'urgency': urgency,
+        'image_match': True
+    }
+
+MATCH_PROFILES = {
+    # find_matches: the first of image, identification and text that scores decides
+    'standard': MatchProfile('standard', [
+        stage('image_file', key='image', applies=both_images),
+        stage('identification', applies=no_images),
+        stage('text')
+    ], threshold=30, mode='first', filters=(different_reporters,), finish=standard_result),
+    # Lower threshold for ID-based matching
+    'identification': MatchProfile('identification', [
+        stage('identification', weight=0.7),
+        stage('text', key='item', weight=0.3, cost=1, field='item')
+    ], threshold=25, filters=(different_reporters, identification_only), finish=identification_result),
+    'enhanced': MatchProfile('enhanced', [
+        stage('text', key='name', weight=0.4, cost=1, max_score=1.0, field='item', fraction=True),
+        stage('text', key='description', weight=0.4, max_score=1.0, field='description', fraction=True),
+        stage('location', weight=0.2)
+    ], threshold=0.3, strict=True, finish=enhanced_result),
+    # Only show meaningful matches (skip 0% and very low matches)
+    'image': MatchProfile('image', [
+        stage('image')
+    ], threshold=15, filters=(different_reporters, both_images), finish=image_result),
+    # Plain text similarity, used by tasks.find_matches_task
+    'text': MatchProfile('text', [
+        stage('text')
+    ], threshold=50)
+}
+
+def save_match(conn, lost_id, found_id, kind, result):
+    """Upsert one scored pair, or drop it when it no longer clears the threshold"""
+    if result is None:
+        conn.execute("""
+            DELETE FROM matches WHERE lost_report_id = ? AND found_report_id = ? AND match_kind = ?
+        """, (lost_id, found_id, kind))
+        return
+    
+    conn.execute("""
+        INSERT INTO matches (lost_report_id, found_report_id, match_kind, similarity_score,
+                             image_similarity, text_similarity, details)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(lost_report_id, found_report_id, match_kind) DO UPDATE SET
+            similarity_score = excluded.similarity_score,
+            image_similarity = excluded.image_similarity,
+            text_similarity = excluded.text_similarity,
+            details = excluded.details
+    """, (
+        lost_id,
+        found_id,
+        kind,
+        result['similarity'],
+        result.get('image_similarity', 0.0),
+        result.get('text_similarity', 0.0),
+        json.dumps(result)
+    ))
+
+def score_pair(lost, found, lost_text, found_text, scan_images=True,
+               lost_image=None, found_image=None, image_percentage=None):
+    """Every matcher's result for one pair, {kind: result or None}
+
+    `image_percentage` is the scan result when it was already computed in a batch.
+    """
+    context = {
+        'lost_text': lost_text,
+        'found_text': found_text,
+        'lost_image': lost_image,
+        'found_image': found_image,
+        'image_percentage': image_percentage
+    }
+    return {
+        kind: MATCH_PROFILES[kind].evaluate(lost, found, context)
+        if kind != 'image' or scan_images else None
+        for kind in MATCH_KINDS
+    }
+
+def match_candidate_index(reports):
+    """CandidateIndex over `reports` with the postings the match profiles need"""
+    return CandidateIndex(reports, categorize=auto_categorize_item, location_groups=location_groups)
+
+def update_matches_for_report(conn, report_id):
+    """Score a newly filed report against the active reports of the opposite type"""
+    report = conn.execute("SELECT * FROM reports WHERE id = ?", (report_id,)).fetchone()
+    if not report:
+        return 0
+    
+    is_lost = report['type'] == 'lost'
+    opposite_type = 'found' if is_lost else 'lost'
+    
+    # Reports that already existed when this one was filed
+    others = conn.execute("""
+        SELECT * FROM reports
+        WHERE type = ? AND status = 'active' AND id < ?
+        ORDER BY date_reported DESC
+    """, (opposite_type, report_id)).fetchall()
+    
+    if is_lost:
+        image_pairs = image_neighbour_pairs(conn, [report], others)
+    else:
+        image_pairs = image_neighbour_pairs(conn, others, [report])
+    # Only reports sharing a posting or close enough on image are scored
+    candidates = match_candidate_index(others).candidates(
+        report, {found_id if is_lost else lost_id for lost_id, found_id in image_pairs}
+    )
+    texts = get_report_texts(conn, [report] + candidates)
+    images = get_match_images(conn, [report] + candidates)
+    image_scans = batch_image_percentages(images, image_pairs)
+    
+    saved = 0
+    for other in candidates:
+        lost, found = (report, other) if is_lost else (other, report)
+        results = score_pair(
+            lost, found, texts[lost['id']], texts[found['id']],
+            scan_images=(lost['id'], found['id']) in image_scans,
+            lost_image=images.get(lost['id']),
+            found_image=images.get(found['id']),
+            image_percentage=image_scans.get((lost['id'], found['id']))
+        )
         
-        for lost in lost_items:
-            for found in found_items:
-                # Skip if same user reported both items
-                if lost['email'] == found['email']:
-                    continue
-                
-                # Image-based similarity if both have images
-                image_percentage = 0.0
-                if lost['image_filename'] and found['image_filename']:
-                    lost_img = os.path.join(app.config['UPLOAD_FOLDER'], lost['image_filename'])
-                    found_img = os.path.join(app.config['UPLOAD_FOLDER'], found['image_filename'])
-                    
-                    if os.path.exists(lost_img) and os.path.exists(found_img):
-                        image_percentage = simple_image_similarity(lost_img, found_img)
-                
-                # Identification-based matching if no images
-                identification_percentage = 0.0
-                if not lost['image_filename'] and not found['image_filename']:
-                    identification_percentage = calculate_identification_match(
-                        lost['description'], found['description']
-                    )
-                
-                # Text similarity as fallback
-                text_sim = calculate_similarity(
-                    f"{lost['item_name']} {lost['description']}",
-                    f"{found['item_name']} {found['description']}"
-                )
-                text_percentage = text_sim * 100
-                
-                # Determine final percentage and match type
-                if image_percentage > 0:
-                    final_percentage = image_percentage
-                    match_type = 'Image-Based'
-                elif identification_percentage > 0:
-                    final_percentage = identification_percentage
-                    match_type = 'ID-Based'
-                else:
-                    final_percentage = text_percentage
-                    match_type = 'Text-Based'
-                
-                if final_percentage >= 30:
-                    if final_percentage >= 80:
-                        level = 'High Match'
-                    elif final_percentage >= 60:
-                        level = 'Medium Match'
-                    else:
-                        level = 'Low Match'
-                    
-                    matches.append({
-                        'lost': dict(lost),
-                        'found': dict(found),
-                        'match_score': f'{level} - {final_percentage:.1f}%',
-                        'similarity': final_percentage / 100,
-                        'image_similarity': image_percentage,
-                        'identification_similarity': identification_percentage,
-                        'text_similarity': text_percentage,
-                        'match_type': match_type
-                    })
-        
-        matches.sort(key=lambda x: x['similarity'], reverse=True)
+        for kind, result in results.items():
+            if result is not None:
+                save_match(conn, lost['id'], found['id'], kind, result)
+                saved += 1
+    
+    # The report itself was committed before its matches existed
+    bump_data_version(conn)
+    return saved
+
+def get_image_hashes(conn, reports):
+    """{report_id: (dhash, phash)}, hashing images stored before hashes existed"""
+    with_images = [report for report in reports if report['image_filename']]
+    hashes = load_image_hashes(conn, [report['id'] for report in with_images])
+    for report in with_images:
+        path = upload_path(report)
+        pixels_path = analysis_image(path) if report['id'] not in hashes and path else None
+        if pixels_path:
+            report_hashes = index_image(conn, report['id'], pixels_path)
+            if report_hashes:
+                hashes[report['id']] = report_hashes
+    return hashes
+
+def get_image_records(conn, reports):
+    """{report_id: ImageRecord}, computing records for images stored before they existed"""
+    with_images = [report for report in reports if report['image_filename']]
+    records = load_image_records(conn, [report['id'] for report in with_images])
+    for report in with_images:
+        path = upload_path(report)
+        pixels_path = analysis_image(path) if report['id'] not in records and path else None
+        if pixels_path:
+            record = store_image_record(conn, report['id'], path, pixels_path)
+            if record:
+                records[report['id']] = record
+    return records
+
+# One append-only feature file per report type, mapped by every process
+feature_stores = {
+    report_type: FeatureStore(os.path.join(app.config['FEATURE_STORE_FOLDER'], f'{report_type}.features'))
+    for report_type in ('lost', 'found')
+} if store_available() else None
+
+def get_match_images(conn, reports):
+    """{report_id: image} for the matchers
+
+    Images are StoredImage rows of the feature stores when numpy is
+    installed, appending rows for images that do not have one yet, and
+    ImageRecords otherwise.
+    """
+    if not feature_stores:
+        return get_image_records(conn, reports)
+    
+    with_images = [report for report in reports if report['image_filename']]
+    rows = load_store_rows(conn, [report['id'] for report in with_images])
+    missing = [report for report in with_images if report['id'] not in rows]
+    if missing:
+        records = get_image_records(conn, missing)
+        for report in missing:
+            if report['id'] in records:
+                rows[report['id']] = feature_stores[report['type']].append(records[report['id']])
+                save_store_row(conn, report['id'], rows[report['id']])
+    
+    images = {}
+    for report_type, store in feature_stores.items():
+        images.update(store.images({report['id']: rows[report['id']] for report in with_images
+                                    if report['type'] == report_type and report['id'] in rows}))
+    return images
+
+def batch_image_percentages(images, pairs):
+    """{(lost_id, found_id): scan percentage or None} for `pairs`
+
+    Percentages come from the batched kernel in image_kernel.py, reading the
+    feature stores, when numpy is installed; otherwise they are left as None
+    for the scalar scorer.
+    """
+    scans = dict.fromkeys(pairs)
+    pairs = [(lost_id, found_id) for lost_id, found_id in pairs if lost_id in images and found_id in images]
+    if not kernel_available() or not pairs:
+        return scans
+    
+    lost_ids = sorted({lost_id for lost_id, _ in pairs})
+    found_ids = sorted({found_id for _, found_id in pairs})
+    columns = {found_id: column for column, found_id in enumerate(found_ids)}
+    wanted = {}
+    for lost_id, found_id in pairs:
+        wanted.setdefault(lost_id, []).append(found_id)
+    
+    lost = feature_stores['lost'].arrays([images[lost_id].row for lost_id in lost_ids])
+    found = feature_stores['found'].arrays([images[found_id].row for found_id in found_ids])
+    for start, block in overall_percentage_blocks(lost, found):
+        for row, lost_id in enumerate(lost_ids[start:start + len(block)]):
+            for found_id in wanted[lost_id]:
+                scans[(lost_id, found_id)] = round(float(block[row, columns[found_id]]), 2)
+    return scans
+
+def get_image_colors(conn, reports):
+    """{report_id: dominant colours}, indexing images stored before colours existed"""
+    with_images = [report for report in reports if report['image_filename']]
+    colors = load_image_colors(conn, [report['id'] for report in with_images])
+    for report in with_images:
+        path = upload_path(report)
+        pixels_path = analysis_image(path) if report['id'] not in colors and path else None
+        if pixels_path:
+            report_colors = index_colors(conn, report['id'], pixels_path)
+            if report_colors:
+                colors[report['id']] = report_colors
+    return colors
+
+def get_scan_colors(conn, reports):
+    """{report_id: dominant colours and the scan's mean colour}
+
+    The mean colour is the one mean_color_similarity compares, so pairs whose
+    means are more than MAX_CHANNEL_DIFF apart score 0 on colour.
+    """
+    colors = get_image_colors(conn, reports)
+    images = get_match_images(conn, reports)
+    means = {}
+    if feature_stores:
+        for report_type, store in feature_stores.items():
+            report_ids = [report['id'] for report in reports if report['type'] == report_type and report['id'] in images]
+            if report_ids:
+                _, store_means, _, _ = store.arrays([images[report_id].row for report_id in report_ids])
+                means.update(zip(report_ids, store_means.tolist()))
+    else:
+        means = {report_id: image.mean_rgb for report_id, image in images.items()}
+    for report_id, (r, g, b) in means.items():
+        colors[report_id] = colors.get(report_id, []) + [(r, g, b, 1.0)]
+    return colors
+
+def image_neighbour_pairs(conn, lost_items, found_items):
+    """(lost_id, found_id) pairs close enough on perceptual hash for the full image scan
+
+    With IMAGE_COLOR_LEVELS set, pairs must also have a dominant or mean
+    colour in neighbouring colour buckets. Every dropped pair scores 0 on
+    colour and so at most 60% on histogram and brightness, but at the image
+    matcher's 15% threshold most of them still match, so it is off by
+    default (see benchmarks/color_prefilter.py).
+    """
+    levels = app.config['IMAGE_COLOR_LEVELS']
+    if levels:
+        color_pairs = near_color_pairs(get_scan_colors(conn, lost_items), get_scan_colors(conn, found_items), levels)
+        if not color_pairs:
+            return set()
+        # Only reports with a colour neighbour need their hashes compared
+        lost_ids = {lost_id for lost_id, _ in color_pairs}
+        found_ids = {found_id for _, found_id in color_pairs}
+        lost_items = [item for item in lost_items if item['id'] in lost_ids]
+        found_items = [item for item in found_items if item['id'] in found_ids]
+    
+    pairs = near_image_pairs(
+        get_image_hashes(conn, lost_items),
+        get_image_hashes(conn, found_items),
+        app.config['IMAGE_HASH_RADIUS']
+    )
+    return pairs & color_pairs if levels else pairs
+
+def rebuild_state(conn, lost_items, found_items):
+    """(lost reports by id, text features, images, found candidate index) of a rebuild"""
+    reports = list(lost_items) + list(found_items)
+    return (
+        {lost['id']: lost for lost in lost_items},
+        get_report_texts(conn, reports),
+        get_match_images(conn, reports),
+        match_candidate_index(found_items)
+    )
+
+# State of a parallel rebuild in each worker process, see init_rebuild_worker
+_rebuild_state = None
+
+def init_rebuild_worker(lost_ids, found_ids):
+    """Load a rebuild's state in a spawned worker
+
+    Nothing is inherited from the parent: the reports and their text
+    features are read back from SQLite and the images from the memory-mapped
+    feature stores, all written and committed by the parent beforehand.
+    """
+    global _rebuild_state
+    conn = get_db_connection()
+    reports = {report['id']: report for report in select_in(
+        conn, "SELECT * FROM reports WHERE id IN ({placeholders})", list(lost_ids) + list(found_ids)
+    )}
+    _rebuild_state = rebuild_state(
+        conn,
+        [reports[lost_id] for lost_id in lost_ids if lost_id in reports],
+        [reports[found_id] for found_id in found_ids if found_id in reports]
+    )
+    conn.close()
+
+def score_lost_shard(shard, state=None):
+    """Score a shard of the lost reports against their candidate found reports
+
+    `shard` is the lost ids and the image scans of their hash neighbours.
+    """
+    lost_ids, image_scans = shard
+    lost_items, texts, images, found_index = state or _rebuild_state
+    image_neighbours = {}
+    for lost_id, found_id in image_scans:
+        image_neighbours.setdefault(lost_id, set()).add(found_id)
+    
+    scored = []
+    for lost_id in lost_ids:
+        lost = lost_items[lost_id]
+        for found in found_index.candidates(lost, image_neighbours.get(lost_id, ())):
+            results = score_pair(
+                lost, found, texts[lost_id], texts[found['id']],
+                scan_images=(lost_id, found['id']) in image_scans,
+                lost_image=images.get(lost_id),
+                found_image=images.get(found['id']),
+                image_percentage=image_scans.get((lost_id, found['id']))
+            )
+            for kind, result in results.items():
+                if result is not None:
+                    scored.append((lost_id, found['id'], kind, result))
+    return scored
+
+def rebuild_matches(conn, workers=1):
+    """Rescore every active lost x found pair (backfill and full refresh)
+
+    With more than one worker the lost reports are sharded across a spawned
+    process pool, which is only safe offline (see `flask rebuild-matches`):
+    text features, feature store rows and image scans are computed and
+    committed here first, and each worker loads them once on start.
+    """
+    workers = max(1, workers)
+    lost_items = conn.execute("SELECT * FROM reports WHERE type = 'lost' AND status = 'active' ORDER BY id").fetchall()
+    found_items = conn.execute("SELECT * FROM reports WHERE type = 'found' AND status = 'active' ORDER BY id").fetchall()
+    state = rebuild_state(conn, lost_items, found_items)
+    image_pairs = image_neighbour_pairs(conn, lost_items, found_items)
+    image_scans = batch_image_percentages(state[2], image_pairs)
+    conn.commit()
+    
+    # Interleaved shards keep the per-worker load even
+    lost_ids = [lost['id'] for lost in lost_items]
+    shards = []
+    for start in range(workers):
+        shard_ids = lost_ids[start::workers]
+        shard_set = set(shard_ids)
+        shards.append((shard_ids, {pair: scan for pair, scan in image_scans.items() if pair[0] in shard_set}))
+    
+    if workers > 1:
+        found_ids = [found['id'] for found in found_items]
+        with multiprocessing.get_context('spawn').Pool(
+            workers, initializer=init_rebuild_worker, initargs=(lost_ids, found_ids)
+        ) as pool:
+            shard_results = pool.map(score_lost_shard, shards)
+    else:
+        shard_results = [score_lost_shard(shard, state) for shard in shards]
+    
+    conn.execute("DELETE FROM matches")
+    for scored in shard_results:
+        for lost_id, found_id, kind, result in scored:
+            save_match(conn, lost_id, found_id, kind, result)
+    bump_data_version(conn)
+    conn.commit()
+
+MATCH_PAGE_SIZE = 200
+
+def encode_match_cursor(score, lost_id, found_id):
+    """Opaque keyset position after one stored match"""
+    return f"{score!r}:{lost_id}:{found_id}"
+
+def decode_match_cursor(cursor):
+    """(score, lost_id, found_id) from a cursor, ValueError if malformed"""
+    score, lost_id, found_id = cursor.split(':')
+    return float(score), int(lost_id), int(found_id)
+
+def iter_matches(conn, kind, limit=None, cursor=None):
+    """Yield (cursor, match) for stored matches of one kind, best first
+
+    Rows are read a page at a time by keyset on (score, lost id, found id),
+    so only one page of matches and report rows is held at once.
+    """
+    remaining = -1 if limit is None else max(limit, 0)
+    after = decode_match_cursor(cursor) if cursor else None
+    
+    while remaining != 0:
+        page_size = MATCH_PAGE_SIZE if remaining < 0 else min(remaining, MATCH_PAGE_SIZE)
+        keyset = ''
+        params = [kind]
+        if after:
+            keyset = """AND (m.similarity_score < ? OR (m.similarity_score = ?
+                         AND (m.lost_report_id, m.found_report_id) > (?, ?)))"""
+            params += [after[0], after[0], after[1], after[2]]
+        rows = conn.execute(f"""
+            SELECT m.lost_report_id, m.found_report_id, m.similarity_score, m.details
+            FROM matches m
+            JOIN reports l ON l.id = m.lost_report_id
+            JOIN reports f ON f.id = m.found_report_id
+            WHERE m.match_kind = ? {keyset}
+            ORDER BY m.similarity_score DESC, m.lost_report_id, m.found_report_id
+            LIMIT ?
+        """, params + [page_size]).fetchall()
+        if not rows:
+            return
+        
+        report_ids = list({row['lost_report_id'] for row in rows} | {row['found_report_id'] for row in rows})
+        placeholders = ','.join('?' * len(report_ids))
+        reports = {report['id']: dict(report) for report in
+                   conn.execute(f"SELECT * FROM reports WHERE id IN ({placeholders})", report_ids)}
+        
+        for row in rows:
+            match = {
+                'lost': reports[row['lost_report_id']],
+                'found': reports[row['found_report_id']]
+            }
+            match.update(json.loads(row['details']))
+            yield encode_match_cursor(row['similarity_score'], row['lost_report_id'], row['found_report_id']), match
+        
+        last = rows[-1]
+        after = (last['similarity_score'], last['lost_report_id'], last['found_report_id'])
+        if remaining > 0:
+            remaining -= len(rows)
+        if len(rows) < page_size:
+            return
+
+def load_matches(conn, kind, limit=None):
+    """Stored matches of one kind, best first, with both report rows attached"""
+    return [match for _, match in iter_matches(conn, kind, limit=limit)]
+
+def wants_ndjson():
+    return (request.args.get('format') == 'ndjson'
+            or request.accept_mimetypes.best == 'application/x-ndjson')
+
+def ndjson_response(conn, matches):
+    """Stream (cursor, match) pairs one JSON object per line, closing conn at the end"""
+    def generate():
+        try:
+            for cursor, match in matches:
+                if cursor is not None:
+                    match = dict(match, cursor=cursor)
+                yield json.dumps(match) + '\n'
+        finally:
+            conn.close()
+    # Keeps the request, and its pooled connection, until the stream ends
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def stored_matches_response(kind, default_limit=None):
+    """Stored matches as a JSON list, or NDJSON with ?format=ndjson
+
+    ?limit= and ?cursor= page through the results. JSON responses carry the
+    cursor for the next page in X-Next-Cursor, NDJSON lines carry their own.
+    """
+    limit = request.args.get('limit', default_limit, type=int)
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            decode_match_cursor(cursor)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+    
+    conn = get_db_connection()
+    matches = iter_matches(conn, kind, limit=limit, cursor=cursor)
+    if wants_ndjson():
+        return ndjson_response(conn, matches)
+    
+    try:
+        page = list(matches)
+    finally:
         conn.close()
-        return jsonify(matches)
+    response = jsonify([match for _, match in page])
+    if page and limit is not None and len(page) == limit:
+        response.headers['X-Next-Cursor'] = page[-1][0]
+    return response
+
+@app.route('/find_matches')
+@cached_by_data_version
+def find_matches():
+    try:
+        return stored_matches_response('standard')
         
     except Exception as e:
         return jsonify([]), 200
@@ -1089,18 +2274,23 @@ def give_reward():
 def my_rewards():
     email = session.get('user_email', '')
     
+    cursor = request.args.get('cursor')
+    if not valid_cursor(cursor):
+        return redirect(url_for('my_rewards'))
+    
     conn = get_db_connection()
-    rewards_raw = conn.execute("""
-        SELECT * FROM rewards WHERE finder_email = ? ORDER BY created_at DESC
-    """, (email,)).fetchall()
+    rewards_raw, next_cursor = keyset_page(conn, 'rewards', 'finder_email = ?', (email,), 'created_at', cursor)
     rewards = [dict(reward) for reward in rewards_raw]
     
-    # Calculate total tokens
-    total_tokens = sum(reward['tokens'] for reward in rewards)
+    # Calculate total tokens over every reward, not just this page
+    totals = conn.execute("""
+        SELECT COUNT(*) as count, COALESCE(SUM(tokens), 0) as tokens FROM rewards WHERE finder_email = ?
+    """, (email,)).fetchone()
     
     conn.close()
     
-    return render_template('my_rewards.html', rewards=rewards, total_tokens=total_tokens, user_email=email)
+    return render_template('my_rewards.html', rewards=rewards, total_tokens=totals['tokens'],
+                           reward_count=totals['count'], next_cursor=next_cursor, user_email=email)
 
 
 
@@ -1118,11 +2308,46 @@ def clear_all_data():
     conn.execute("DELETE FROM reports")
     conn.execute("DELETE FROM notifications")
     conn.execute("DELETE FROM rewards")
+    conn.execute("DELETE FROM matches")
+    conn.execute("DELETE FROM report_text")
+    conn.execute("DELETE FROM report_minhash")
+    conn.execute("DELETE FROM lsh_buckets")
+    conn.execute("DELETE FROM image_hashes")
+    conn.execute("DELETE FROM image_colors")
+    conn.execute("DELETE FROM image_features")
+    conn.execute("DELETE FROM image_store_rows")
+    conn.execute("DELETE FROM uploads")
+    conn.execute("DELETE FROM image_jobs")
+    conn.execute("DELETE FROM scan_cache")
     conn.commit()
     conn.close()
+    # No report owns a feature store row any more
+    if feature_stores:
+        for store in feature_stores.values():
+            store.clear()
     flash('All data cleared. Starting fresh!', 'success')
     return redirect(url_for('index'))
 
+@app.route('/rebuild_matches', methods=['POST'])
+def rebuild_matches_route():
+    """Rescore every active pair in this process, `flask rebuild-matches` runs it in parallel"""
+    if not session.get('admin_authenticated'):
+        return jsonify({'error': 'Admin access required'}), 403
+
+    try:
+        start_time = time.time()
+        conn = get_db_connection()
+        rebuild_matches(conn)
+        total = conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+        conn.close()
+        return jsonify({
+            'success': True,
+            'matches': total,
+            'seconds': round(time.time() - start_time, 2)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/urgent_items')
 def urgent_items():
     """Get urgent/emergency items that need immediate attention"""
@@ -1193,166 +2418,64 @@ def urgent_items():
         return jsonify([]), 200
 
 @app.route('/find_identification_matches')
+@cached_by_data_version
 def find_identification_matches():
     """Find matches based on identification details for items without images"""
     try:
-        conn = get_db_connection()
-        # Get items without images that have identification details
-        lost_items = conn.execute("""
-            SELECT * FROM reports 
-            WHERE type = 'lost' AND (image_filename IS NULL OR image_filename = '') 
-            AND description LIKE '%| IDENTIFICATION:%'
-            ORDER BY date_reported DESC
-        """).fetchall()
-        
-        found_items = conn.execute("""
-            SELECT * FROM reports 
-            WHERE type = 'found' AND (image_filename IS NULL OR image_filename = '') 
-            AND description LIKE '%| IDENTIFICATION:%'
-            ORDER BY date_reported DESC
-        """).fetchall()
-        conn.close()
-        
-        matches = []
-        
-        for lost in lost_items:
-            for found in found_items:
-                # Skip same user matches
-                if lost['email'] == found['email']:
-                    continue
-                
-                # Calculate identification match
-                id_percentage = calculate_identification_match(
-                    lost['description'], found['description']
-                )
-                
-                # Also check basic item similarity
-                item_similarity = calculate_nlp_text_similarity(
-                    lost['item_name'], found['item_name']
-                )
-                
-                # Combined score (70% identification, 30% item name)
-                combined_score = (id_percentage * 0.7) + (item_similarity * 0.3)
-                
-                if combined_score >= 25:  # Lower threshold for ID-based matching
-                    if combined_score >= 70:
-                        match_level = 'High ID Match'
-                        urgency = 'HIGH'
-                    elif combined_score >= 50:
-                        match_level = 'Medium ID Match'
-                        urgency = 'MEDIUM'
-                    else:
-                        match_level = 'Possible ID Match'
-                        urgency = 'LOW'
-                    
-                    matches.append({
-                        'lost': dict(lost),
-                        'found': dict(found),
-                        'match_score': f'{match_level} - {combined_score:.1f}%',
-                        'similarity': combined_score / 100,
-                        'identification_match': id_percentage,
-                        'item_match': item_similarity,
-                        'urgency': urgency,
-                        'match_type': 'Identification-Based'
-                    })
-        
-        matches.sort(key=lambda x: x['similarity'], reverse=True)
-        return jsonify(matches[:15])  # Limit to top 15 matches
+        return stored_matches_response('identification', default_limit=15)  # Top 15 unless paged
         
     except Exception as e:
         print(f"ID matching error: {e}")
         return jsonify([])
 
 @app.route('/ai_find_matches')
+@cached_by_data_version
 def ai_find_matches():
     """Smart image-based matching with proper 0-100% range"""
     try:
-        conn = get_db_connection()
-        # Limit to recent items for faster processing
-        lost_items = conn.execute("SELECT * FROM reports WHERE type = 'lost' AND image_filename IS NOT NULL AND image_filename != '' ORDER BY date_reported DESC LIMIT 20").fetchall()
-        found_items = conn.execute("SELECT * FROM reports WHERE type = 'found' AND image_filename IS NOT NULL AND image_filename != '' ORDER BY date_reported DESC LIMIT 20").fetchall()
-        conn.close()
-        
-        matches = []
-        processed = 0
-        max_comparisons = 50
-        
-        for lost in lost_items:
-            if processed >= max_comparisons:
-                break
-                
-            for found in found_items:
-                if processed >= max_comparisons:
-                    break
-                    
-                # Skip same user matches
-                if lost['email'] == found['email']:
-                    continue
-                
-                lost_img_path = os.path.join(app.config['UPLOAD_FOLDER'], lost['image_filename'])
-                found_img_path = os.path.join(app.config['UPLOAD_FOLDER'], found['image_filename'])
-                
-                if not os.path.exists(lost_img_path) or not os.path.exists(found_img_path):
-                    continue
-                
-                # Smart image analysis
-                cv_result = advanced_computer_vision_scan(lost_img_path, found_img_path)
-                processed += 1
-                
-                if cv_result.get('error'):
-                    continue
-                
-                percentage = cv_result['overall_percentage']
-                
-                # Only show meaningful matches (skip 0% and very low matches)
-                if percentage >= 15:
-                    if percentage >= 80:
-                        match_level = 'Excellent Match'
-                        urgency = 'HIGH'
-                    elif percentage >= 60:
-                        match_level = 'Good Match'
-                        urgency = 'MEDIUM'
-                    elif percentage >= 30:
-                        match_level = 'Fair Match'
-                        urgency = 'LOW'
-                    else:
-                        match_level = 'Weak Match'
-                        urgency = 'LOW'
-                    
-                    matches.append({
-                        'lost': dict(lost),
-                        'found': dict(found),
-                        'match_score': f'{match_level} - {percentage:.1f}%',
-                        'similarity': percentage / 100,
-                        'urgency': urgency,
-                        'image_match': True
-                    })
-        
-        matches.sort(key=lambda x: x['similarity'], reverse=True)
-        return jsonify(matches[:10])
+        return stored_matches_response('image', default_limit=10)
         
     except Exception as e:
         print(f"Image matching error: {e}")
         return jsonify([])
 
+@app.route('/report_image_status/<int:report_id>')
+def report_image_status(report_id):
+    """Background image processing status of a report: pending, processing, done or failed"""
+    conn = get_db_connection()
+    job = conn.execute("SELECT status, error, updated_at FROM image_jobs WHERE report_id = ?", (report_id,)).fetchone()
+    conn.close()
+    if not job:
+        return jsonify({'error': 'No image job for this report'}), 404
+    return jsonify({
+        'report_id': report_id,
+        'status': job['status'],
+        'error': job['error'],
+        'updated_at': job['updated_at']
+    })
+
 @app.route('/scan_images', methods=['POST'])
 def scan_images():
-    """AI Image scanning for admin - compare two images"""
+    """AI Image scanning for admin - compare two images, or lost_ids x found_ids in batch"""
     try:
         data = request.json
+        if 'lost_ids' in data or 'found_ids' in data:
+            return scan_images_batch(data.get('lost_ids') or [], data.get('found_ids') or [])
+        
         lost_id = data.get('lost_id')
         found_id = data.get('found_id')
         
         conn = get_db_connection()
         lost_item = conn.execute("SELECT * FROM reports WHERE id = ? AND type = 'lost'", (lost_id,)).fetchone()
         found_item = conn.execute("SELECT * FROM reports WHERE id = ? AND type = 'found'", (found_id,)).fetchone()
-        conn.close()
         
         if not lost_item or not found_item:
+            conn.close()
             return jsonify({'error': 'Items not found'}), 404
         
         # Check if both items have images
         if not lost_item['image_filename'] or not found_item['image_filename']:
+            conn.close()
             return jsonify({
                 'success': False,
                 'message': 'Both items must have images for scanning',
@@ -1363,14 +2486,17 @@ def scan_images():
         found_img_path = os.path.join(app.config['UPLOAD_FOLDER'], found_item['image_filename'])
         
         if not os.path.exists(lost_img_path) or not os.path.exists(found_img_path):
+            conn.close()
             return jsonify({
                 'success': False,
                 'message': 'Image files not found on server',
                 'scan_result': None
             })
         
-        # Perform AI image analysis
-        scan_result = perform_ai_image_scan(lost_img_path, found_img_path, lost_item, found_item)
+        # Perform AI image analysis, reusing an earlier scan of the same images
+        cv_result = cached_computer_vision_scan(conn, lost_item, found_item, lost_img_path, found_img_path)
+        conn.close()
+        scan_result = perform_ai_image_scan(lost_img_path, found_img_path, lost_item, found_item, cv_result)
         
         return jsonify({
             'success': True,
@@ -1385,11 +2511,74 @@ def scan_images():
             'scan_result': None
         }), 500
 
-def perform_ai_image_scan(img1_path, img2_path, lost_item, found_item):
-    """Fast AI image analysis"""
+# Reports per side one batch scan may ask for
+MAX_BATCH_SCAN = 500
+
+def scan_match_level(percentage):
+    if percentage >= 80:
+        return 'HIGH'
+    elif percentage >= 60:
+        return 'MEDIUM'
+    return 'LOW'
+
+def scan_images_batch(lost_ids, found_ids):
+    """Scan every lost x found image pair from the stored image records in one pass"""
+    conn = get_db_connection()
+    
+    def fetch(report_type, ids):
+        ids = [int(report_id) for report_id in ids[:MAX_BATCH_SCAN]]
+        if not ids:
+            return []
+        placeholders = ','.join('?' * len(ids))
+        return conn.execute(f"""
+            SELECT * FROM reports WHERE type = ? AND id IN ({placeholders}) ORDER BY id
+        """, [report_type] + ids).fetchall()
+    
+    lost_items = fetch('lost', lost_ids)
+    found_items = fetch('found', found_ids)
+    images = get_match_images(conn, list(lost_items) + list(found_items))
+    conn.commit()
+    conn.close()
+    
+    lost_items = [item for item in lost_items if item['id'] in images]
+    found_items = [item for item in found_items if item['id'] in images]
+    
+    percentages = []
+    if kernel_available() and lost_items and found_items:
+        lost = feature_stores['lost'].arrays([images[item['id']].row for item in lost_items])
+        found = feature_stores['found'].arrays([images[item['id']].row for item in found_items])
+        for _, block in overall_percentage_blocks(lost, found):
+            percentages.extend([round(value, 2) for value in row] for row in block.tolist())
+    else:
+        percentages = [[image_record_scan(images[lost['id']], images[found['id']])['overall_percentage']
+                        for found in found_items] for lost in lost_items]
+    
+    results = []
+    for lost, row in zip(lost_items, percentages):
+        for found, percentage in zip(found_items, row):
+            results.append({
+                'lost_id': lost['id'],
+                'found_id': found['id'],
+                'lost_item': lost['item_name'],
+                'found_item': found['item_name'],
+                'overall_percentage': percentage,
+                'match_level': scan_match_level(percentage),
+                'recommendation': get_scan_recommendation(percentage)
+            })
+    results.sort(key=lambda x: x['overall_percentage'], reverse=True)
+    
+    return jsonify({
+        'success': True,
+        'message': f'Scanned {len(results)} image pairs',
+        'results': results
+    })
+
+def perform_ai_image_scan(img1_path, img2_path, lost_item, found_item, cv_result=None):
+    """Fast AI image analysis, from cv_result when it is already known"""
     try:
         # Quick computer vision analysis
-        cv_result = advanced_computer_vision_scan(img1_path, img2_path)
+        if cv_result is None:
+            cv_result = advanced_computer_vision_scan(img1_path, img2_path)
         
         if cv_result.get('error'):
             return perform_basic_image_scan(img1_path, img2_path, lost_item, found_item)
@@ -1468,88 +2657,135 @@ def get_scan_recommendation(percentage):
     else:
         return 'UNLIKELY MATCH - Different items'
 
+# Bump whenever advanced_computer_vision_scan changes its results,
+# cached scans from other versions are then ignored and purged
+IMAGE_SCANNER_VERSION = 1
+
+def cached_computer_vision_scan(conn, lost_item, found_item, img1_path, img2_path):
+    """advanced_computer_vision_scan, memoized in scan_cache by the images' content hashes"""
+    images = get_image_records(conn, [lost_item, found_item])
+    lost_image = images.get(lost_item['id'])
+    found_image = images.get(found_item['id'])
+    if not lost_image or not found_image:
+        return advanced_computer_vision_scan(img1_path, img2_path)
+    
+    cv_result = load_scan(conn, lost_image.content_hash, found_image.content_hash, IMAGE_SCANNER_VERSION)
+    if cv_result is None:
+        cv_result = advanced_computer_vision_scan(img1_path, img2_path)
+        if not cv_result.get('error'):
+            store_scan(conn, lost_image.content_hash, found_image.content_hash,
+                       IMAGE_SCANNER_VERSION, cv_result, app.config['SCAN_CACHE_SIZE'])
+    conn.commit()
+    return cv_result
+
+IDENTICAL_SCAN = {
+    'overall_percentage': 100.0,
+    'histogram_similarity': 100.0,
+    'color_similarity': 100.0,
+    'structure_similarity': 100.0,
+    'pattern_similarity': 100.0,
+    'layout_similarity': 100.0,
+    'texture_similarity': 100.0,
+    'brightness_similarity': 100.0,
+    'contrast_similarity': 100.0,
+    'pixel_similarity': 100.0
+}
+
 def advanced_computer_vision_scan(img1_path, img2_path):
     """Smart image analysis with proper 0-100% range"""
     try:
-        # Check for identical files first
-        with open(img1_path, 'rb') as f1, open(img2_path, 'rb') as f2:
-            if f1.read() == f2.read():
-                return {
-                    'overall_percentage': 100.0,
-                    'histogram_similarity': 100.0,
-                    'color_similarity': 100.0,
-                    'structure_similarity': 100.0,
-                    'pattern_similarity': 100.0,
-                    'layout_similarity': 100.0,
-                    'texture_similarity': 100.0,
-                    'brightness_similarity': 100.0,
-                    'contrast_similarity': 100.0,
-                    'pixel_similarity': 100.0
-                }
-        
-        # Load and process images
-        img1 = Image.open(img1_path).convert('RGB')
-        img2 = Image.open(img2_path).convert('RGB')
-        
-        target_size = (128, 128)
-        img1_resized = img1.resize(target_size, Image.NEAREST)
-        img2_resized = img2.resize(target_size, Image.NEAREST)
-        
-        # Calculate individual similarities
-        hist1 = img1_resized.histogram()
-        hist2 = img2_resized.histogram()
-        histogram_similarity = smart_histogram_similarity(hist1, hist2)
-        
-        color_similarity = smart_color_similarity(img1_resized, img2_resized)
-        brightness_similarity = calculate_brightness_similarity(img1_resized, img2_resized)
-        
-        # Check if images are completely different
-        if histogram_similarity < 5 and color_similarity < 10 and brightness_similarity < 10:
-            return {
-                'overall_percentage': 0.0,
-                'histogram_similarity': 0.0,
-                'color_similarity': 0.0,
-                'structure_similarity': 0.0,
-                'pattern_similarity': 0.0,
-                'layout_similarity': 0.0,
-                'texture_similarity': 0.0,
-                'brightness_similarity': 0.0,
-                'contrast_similarity': 0.0,
-                'pixel_similarity': 0.0
-            }
-        
-        # Calculate weighted score for similar characteristics
-        overall_percentage = (
-            histogram_similarity * 0.4 +
-            color_similarity * 0.4 +
-            brightness_similarity * 0.2
-        )
-        
-        # Perfect match detection
-        if histogram_similarity > 98 and color_similarity > 98 and brightness_similarity > 95:
-            overall_percentage = 100.0
-        
-        # Ensure minimum threshold for any similarity
-        if overall_percentage < 5:
-            overall_percentage = 0.0
-        
-        return {
-            'overall_percentage': round(min(100, max(0, overall_percentage)), 2),
-            'histogram_similarity': round(histogram_similarity, 2),
-            'color_similarity': round(color_similarity, 2),
-            'structure_similarity': round(brightness_similarity, 2),
-            'pattern_similarity': round(color_similarity, 2),
-            'layout_similarity': round(histogram_similarity, 2),
-            'texture_similarity': round(brightness_similarity, 2),
-            'brightness_similarity': round(brightness_similarity, 2),
-            'contrast_similarity': round(color_similarity, 2),
-            'pixel_similarity': round(histogram_similarity, 2)
-        }
+        pixels1_path = analysis_image(img1_path)
+        pixels2_path = analysis_image(img2_path)
+        record1 = compute_image_record(img1_path, pixels1_path)
+        record2 = compute_image_record(img2_path, pixels2_path)
+        result = image_record_scan(record1, record2)
+        if record1.content_hash != record2.content_hash:
+            result.update(deep_image_similarities(pixels1_path or img1_path, pixels2_path or img2_path))
+        return result
         
     except Exception as e:
         print(f"Computer vision error: {e}")
         return {'error': str(e)}
 
+def image_record_scan(record1, record2):
+    """advanced_computer_vision_scan on precomputed image records (no file access)"""
+    # Check for identical files first
+    if record1.content_hash == record2.content_hash:
+        return dict(IDENTICAL_SCAN)
+    
+    # Calculate individual similarities
+    histogram_similarity = smart_histogram_similarity(record1.histogram, record2.histogram)
+    
+    color_similarity = mean_color_similarity(record1.mean_rgb, record2.mean_rgb)
+    brightness_similarity = luminance_similarity(record1.luminance, record2.luminance)
+    
+    # Check if images are completely different
+    if histogram_similarity < 5 and color_similarity < 10 and brightness_similarity < 10:
+        return {
+            'overall_percentage': 0.0,
+            'histogram_similarity': 0.0,
+            'color_similarity': 0.0,
+            'structure_similarity': 0.0,
+            'pattern_similarity': 0.0,
+            'layout_similarity': 0.0,
+            'texture_similarity': 0.0,
+            'brightness_similarity': 0.0,
+            'contrast_similarity': 0.0,
+            'pixel_similarity': 0.0
+        }
+    
+    # Calculate weighted score for similar characteristics
+    overall_percentage = (
+        histogram_similarity * 0.4 +
+        color_similarity * 0.4 +
+        brightness_similarity * 0.2
+    )
+    
+    # Perfect match detection
+    if histogram_similarity > 98 and color_similarity > 98 and brightness_similarity > 95:
+        overall_percentage = 100.0
+    
+    # Ensure minimum threshold for any similarity
+    if overall_percentage < 5:
+        overall_percentage = 0.0
+    
+    return {
+        'overall_percentage': round(min(100, max(0, overall_percentage)), 2),
+        'histogram_similarity': round(histogram_similarity, 2),
+        'color_similarity': round(color_similarity, 2),
+        'structure_similarity': round(brightness_similarity, 2),
+        'pattern_similarity': round(color_similarity, 2),
+        'layout_similarity': round(histogram_similarity, 2),
+        'texture_similarity': round(brightness_similarity, 2),
+        'brightness_similarity': round(brightness_similarity, 2),
+        'contrast_similarity': round(color_similarity, 2),
+        'pixel_similarity': round(histogram_similarity, 2)
+    }
+
+def deep_image_similarities(img1_path, img2_path):
+    """Structure, pattern, layout, texture and pixel similarity of two images
+
+    Compared on SCAN_SIZE thumbnails of the analysis copies, a few
+    milliseconds per pair. Empty without numpy, leaving the record-based values.
+    """
+    if not kernel_available():
+        return {}
+    import numpy as np
+    
+    with Image.open(img1_path) as image1, Image.open(img2_path) as image2:
+        img1 = image1.convert('RGB').resize(SCAN_SIZE, Image.BILINEAR)
+        img2 = image2.convert('RGB').resize(SCAN_SIZE, Image.BILINEAR)
+    
+    # Flat images have no edges or patterns to correlate
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'structure_similarity': round(float(calculate_structure_similarity(img1, img2)), 2),
+            'pattern_similarity': round(float(calculate_pattern_similarity(img1, img2)), 2),
+            'layout_similarity': round(float(calculate_layout_similarity(img1, img2)), 2),
+            'texture_similarity': round(float(calculate_texture_similarity(img1, img2)), 2),
+            'pixel_similarity': round(float(calculate_enhanced_pixel_similarity(img1, img2)), 2)
+        }
+
 def smart_histogram_similarity(hist1, hist2):
     """Smart histogram comparison with proper 0-100% range"""
     try:
@@ -1568,7 +2804,8 @@ def smart_histogram_similarity(hist1, hist2):
         chi_square = 0
         for i in range(len(norm1)):
             if norm1[i] + norm2[i] > 0:
-                chi_square += ((norm1[i] - norm2[i]) ** 2) / (norm1[i] + norm2[i])
+                diff = norm1[i] - norm2[i]
+                chi_square += (diff * diff) / (norm1[i] + norm2[i])
         
         # Convert chi-square to similarity percentage
         # Lower chi-square = higher similarity
@@ -1588,13 +2825,17 @@ def smart_color_similarity(img1, img2):
     """Smart color comparison with proper differentiation"""
     try:
         # Get average colors
-        stat1 = ImageStat.Stat(img1)
-        stat2 = ImageStat.Stat(img2)
-        
+        return mean_color_similarity(ImageStat.Stat(img1).mean, ImageStat.Stat(img2).mean)
+    except:
+        return 0.0
+
+def mean_color_similarity(mean1, mean2):
+    """smart_color_similarity on per-channel mean colours"""
+    try:
         # Calculate color differences
-        r_diff = abs(stat1.mean[0] - stat2.mean[0])
-        g_diff = abs(stat1.mean[1] - stat2.mean[1])
-        b_diff = abs(stat1.mean[2] - stat2.mean[2])
+        r_diff = abs(mean1[0] - mean2[0])
+        g_diff = abs(mean1[1] - mean2[1])
+        b_diff = abs(mean1[2] - mean2[2])
         
         # Perfect match detection
         if r_diff <= 2 and g_diff <= 2 and b_diff <= 2:
@@ -1605,7 +2846,7 @@ def smart_color_similarity(img1, img2):
             return 0.0
         
         # Calculate Euclidean distance in RGB space
-        color_distance = (r_diff ** 2 + g_diff ** 2 + b_diff ** 2) ** 0.5
+        color_distance = math.sqrt(r_diff * r_diff + g_diff * g_diff + b_diff * b_diff)
         
         # Normalize to 0-100 scale with better sensitivity
         if color_distance > 150:  # Very different colors
@@ -1650,16 +2891,16 @@ def calculate_brightness_similarity(img1, img2):
         stat1 = ImageStat.Stat(gray1)
         stat2 = ImageStat.Stat(gray2)
         
-        brightness1 = stat1.mean[0]
-        brightness2 = stat2.mean[0]
-        
-        brightness_diff = abs(brightness1 - brightness2)
-        similarity = max(0, 100 - (brightness_diff / 255 * 100))
-        return similarity
+        return luminance_similarity(stat1.mean[0], stat2.mean[0])
         
     except:
         return 0.0
 
+def luminance_similarity(brightness1, brightness2):
+    """calculate_brightness_similarity on mean grayscale values"""
+    brightness_diff = abs(brightness1 - brightness2)
+    return max(0, 100 - (brightness_diff / 255 * 100))
+
 def calculate_contrast_similarity(img1, img2):
     """Calculate contrast similarity"""
     try:
@@ -1670,16 +2911,16 @@ def calculate_contrast_similarity(img1, img2):
         stat1 = ImageStat.Stat(gray1)
         stat2 = ImageStat.Stat(gray2)
         
-        contrast1 = stat1.stddev[0]
-        contrast2 = stat2.stddev[0]
-        
-        contrast_diff = abs(contrast1 - contrast2)
-        similarity = max(0, 100 - (contrast_diff / 128 * 100))
-        return similarity
+        return stddev_contrast_similarity(stat1.stddev[0], stat2.stddev[0])
         
     except:
         return 0.0
 
+def stddev_contrast_similarity(contrast1, contrast2):
+    """calculate_contrast_similarity on grayscale standard deviations"""
+    contrast_diff = abs(contrast1 - contrast2)
+    return max(0, 100 - (contrast_diff / 128 * 100))
+
 def calculate_advanced_color_similarity(img1, img2):
     """Advanced color analysis with multiple color spaces"""
     try:
@@ -1729,8 +2970,8 @@ def detect_edges(gray_img):
     try:
         import numpy as np
         
-        # Convert to numpy array
-        img_array = np.array(gray_img)
+        # Convert to numpy array, signed so the differences do not wrap
+        img_array = np.asarray(gray_img, dtype=np.float64)
         
         # Sobel-like edge detection
         grad_x = np.abs(np.diff(img_array, axis=1))
@@ -1833,28 +3074,27 @@ def compare_patterns(pattern1, pattern2):
 def calculate_layout_similarity(img1, img2):
     """Analyze spatial layout similarity"""
     try:
+        import numpy as np
+        
         # Divide images into grid and compare regions
         grid_size = 8
-        similarity_scores = []
         
         width, height = img1.size
         cell_w, cell_h = width // grid_size, height // grid_size
         
-        for i in range(grid_size):
-            for j in range(grid_size):
-                x1, y1 = i * cell_w, j * cell_h
-                x2, y2 = x1 + cell_w, y1 + cell_h
-                
-                # Extract regions
-                region1 = img1.crop((x1, y1, x2, y2))
-                region2 = img2.crop((x1, y1, x2, y2))
-                
-                # Compare regions
-                region_sim = calculate_color_similarity(region1, region2)
-                similarity_scores.append(region_sim)
+        # Mean colour of every cell: (grid rows, cell rows, grid cols, cell cols, channels)
+        cell_means = []
+        for img in (img1, img2):
+            arr = np.asarray(img, dtype=np.float64)
+            if arr.ndim == 2:
+                arr = arr[:, :, None]
+            cells = arr[:grid_size * cell_h, :grid_size * cell_w]
+            cells = cells.reshape(grid_size, cell_h, grid_size, cell_w, arr.shape[2])
+            cell_means.append(cells.mean(axis=(1, 3)))
         
-        # Average similarity across all regions
-        return sum(similarity_scores) / len(similarity_scores)
+        # calculate_color_similarity for every region, then the average
+        color_distance = np.sqrt(((cell_means[0] - cell_means[1]) ** 2).sum(axis=2))
+        return float(np.maximum(0, 100 - (color_distance / 441 * 100)).mean())
         
     except:
         return 0.0
@@ -1903,7 +3143,8 @@ def calculate_skewness(data):
         std_val = np.std(data)
         if std_val == 0:
             return 0
-        return np.mean(((data - mean_val) / std_val) ** 3)
+        z = (data - mean_val) / std_val
+        return np.mean(z * z * z)
     except:
         return 0
 
@@ -1915,7 +3156,9 @@ def calculate_kurtosis(data):
         std_val = np.std(data)
         if std_val == 0:
             return 0
-        return np.mean(((data - mean_val) / std_val) ** 4) - 3
+        z = (data - mean_val) / std_val
+        z = z * z
+        return np.mean(z * z) - 3
     except:
         return 0
 
@@ -1958,50 +3201,50 @@ def smooth_array(arr):
     try:
         import numpy as np
         
-        # Simple 3x3 averaging filter
-        kernel = np.ones((3, 3)) / 9
+        # Simple 3x3 averaging filter as sums of shifted views, the one-pixel border stays 0
+        values = np.asarray(arr, dtype=np.float64)
+        rows = values[:-2] + values[1:-1] + values[2:]
         smoothed = np.zeros_like(arr)
-        
-        for i in range(1, arr.shape[0] - 1):
-            for j in range(1, arr.shape[1] - 1):
-                if len(arr.shape) == 3:  # Color image
-                    for k in range(arr.shape[2]):
-                        smoothed[i, j, k] = np.sum(arr[i-1:i+2, j-1:j+2, k] * kernel)
-                else:  # Grayscale
-                    smoothed[i, j] = np.sum(arr[i-1:i+2, j-1:j+2] * kernel)
-        
+        smoothed[1:-1, 1:-1] = (rows[:, :-2] + rows[:, 1:-1] + rows[:, 2:]) / 9
         return smoothed
         
     except:
         return arr
 
-def calculate_ssim(arr1, arr2):
-    """Simplified Structural Similarity Index"""
+def grid_means(arr, size):
+    """Mean of every cell of a size x size grid over the first two axes, the remainder cropped"""
+    import numpy as np
+    
+    arr = np.asarray(arr, dtype=np.float64)
+    rows, cols = arr.shape[0] // size, arr.shape[1] // size
+    cells = arr[:rows * size, :cols * size].reshape((rows, size, cols, size) + arr.shape[2:])
+    return cells.mean(axis=(1, 3))
+
+def calculate_ssim(arr1, arr2, window=8):
+    """Structural Similarity Index, averaged over a grid of window x window patches"""
     try:
         import numpy as np
         
         # Convert to float
-        img1 = arr1.astype(np.float64)
-        img2 = arr2.astype(np.float64)
-        
-        # Calculate means
-        mu1 = np.mean(img1)
-        mu2 = np.mean(img2)
+        img1 = np.asarray(arr1, dtype=np.float64)
+        img2 = np.asarray(arr2, dtype=np.float64)
         
-        # Calculate variances and covariance
-        var1 = np.var(img1)
-        var2 = np.var(img2)
-        cov = np.mean((img1 - mu1) * (img2 - mu2))
+        # Local means, variances and covariance of every window
+        mu1 = grid_means(img1, window)
+        mu2 = grid_means(img2, window)
+        var1 = grid_means(img1 * img1, window) - mu1 * mu1
+        var2 = grid_means(img2 * img2, window) - mu2 * mu2
+        cov = grid_means(img1 * img2, window) - mu1 * mu2
         
         # SSIM constants
         c1 = (0.01 * 255) ** 2
         c2 = (0.03 * 255) ** 2
         
         # Calculate SSIM
-        ssim = ((2 * mu1 * mu2 + c1) * (2 * cov + c2)) / ((mu1**2 + mu2**2 + c1) * (var1 + var2 + c2))
+        ssim_map = ((2 * mu1 * mu2 + c1) * (2 * cov + c2)) / ((mu1 * mu1 + mu2 * mu2 + c1) * (var1 + var2 + c2))
         
         # Convert to percentage
-        return max(0, ssim * 100)
+        return max(0, float(ssim_map.mean()) * 100)
         
     except:
         return 0.0
@@ -2116,25 +3359,30 @@ def generate_scan_points(percentage):
 def debug_ai_data():
     """Debug route to check available data"""
     try:
+        # One page of each type; ?lost_cursor= / ?found_cursor= continue a list
+        lost_cursor = request.args.get('lost_cursor')
+        found_cursor = request.args.get('found_cursor')
+        if not valid_cursor(lost_cursor) or not valid_cursor(found_cursor):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        
         conn = get_db_connection()
-        lost_items = conn.execute("SELECT * FROM reports WHERE type = 'lost'").fetchall()
-        found_items = conn.execute("SELECT * FROM reports WHERE type = 'found'").fetchall()
+        lost_items, lost_next = keyset_page(conn, 'reports', "type = 'lost'", (), 'date_reported', lost_cursor)
+        found_items, found_next = keyset_page(conn, 'reports', "type = 'found'", (), 'date_reported', found_cursor)
+        counts = {row['type']: row['count'] for row in
+                  conn.execute("SELECT type, COUNT(*) as count FROM reports GROUP BY type")}
         conn.close()
         
         return jsonify({
-            'lost_count': len(lost_items),
-            'found_count': len(found_items),
+            'lost_count': counts.get('lost', 0),
+            'found_count': counts.get('found', 0),
             'lost_items': [dict(item) for item in lost_items],
-            'found_items': [dict(item) for item in found_items]
+            'found_items': [dict(item) for item in found_items],
+            'lost_next_cursor': lost_next,
+            'found_next_cursor': found_next
         })
     except Exception as e:
         return jsonify({'error': str(e)})
 
-# Initialize database when module loads
-init_db()
-
-if __name__ == '__main__':
-    app.run(debug=True)
 # Enhanced NLP Features
 def auto_categorize_item(item_name, description):
     """Auto-categorize items using NLP"""
@@ -2155,17 +3403,23 @@ def auto_categorize_item(item_name, description):
             return category
     return 'other'
 
+LOCATION_GROUPS = {
+    'library': ['library', 'study hall', 'reading room', 'book'],
+    'cafeteria': ['cafeteria', 'dining', 'food court', 'restaurant', 'cafe'],
+    'classroom': ['classroom', 'lecture hall', 'room', 'class'],
+    'parking': ['parking', 'garage', 'lot', 'car'],
+    'gym': ['gym', 'fitness', 'sports', 'exercise'],
+    'office': ['office', 'admin', 'reception', 'desk']
+}
+
+def location_groups(location):
+    """Groups of LOCATION_GROUPS a location belongs to"""
+    location_lower = location.lower()
+    return {group for group, keywords in LOCATION_GROUPS.items()
+            if any(keyword in location_lower for keyword in keywords)}
+
 def calculate_location_similarity(loc1, loc2):
     """Calculate similarity between locations"""
-    location_groups = {
-        'library': ['library', 'study hall', 'reading room', 'book'],
-        'cafeteria': ['cafeteria', 'dining', 'food court', 'restaurant', 'cafe'],
-        'classroom': ['classroom', 'lecture hall', 'room', 'class'],
-        'parking': ['parking', 'garage', 'lot', 'car'],
-        'gym': ['gym', 'fitness', 'sports', 'exercise'],
-        'office': ['office', 'admin', 'reception', 'desk']
-    }
-    
     loc1_lower = loc1.lower()
     loc2_lower = loc2.lower()
     
@@ -2173,25 +3427,32 @@ def calculate_location_similarity(loc1, loc2):
     direct_sim = SequenceMatcher(None, loc1_lower, loc2_lower).ratio()
     
     # Group similarity
-    group_sim = 0.0
-    for group, keywords in location_groups.items():
-        loc1_in_group = any(keyword in loc1_lower for keyword in keywords)
-        loc2_in_group = any(keyword in loc2_lower for keyword in keywords)
-        if loc1_in_group and loc2_in_group:
-            group_sim = 0.8
-            break
+    group_sim = 0.8 if location_groups(loc1) & location_groups(loc2) else 0.0
     
     return max(direct_sim, group_sim)
 
-def detect_duplicate_report(new_item, existing_reports):
-    """Detect potential duplicate reports"""
+def detect_duplicate_report(new_item, existing_reports, new_text, texts):
+    """Detect potential duplicate reports
+
+    `new_text` and `texts` hold the precomputed item/description features of
+    the new item and of each existing report (see get_report_texts).
+    """
     duplicates = []
     
     for report in existing_reports:
-        name_sim = calculate_similarity(new_item['item_name'], report['item_name'])
-        desc_sim = calculate_similarity(new_item['description'], report['description'])
+        report_text = texts[report['id']]
+        name_sim = calculate_similarity(new_text['item'], report_text['item'])
         loc_sim = calculate_location_similarity(new_item['location'], report['location'])
         
+        # Only run the full description ratio when 0.7 is still reachable
+        desc_score = bounded_text_similarity(
+            new_text['description'], report_text['description'],
+            (0.7 - name_sim * 0.4 - loc_sim * 0.2) / 0.4 * 100
+        )
+        if desc_score is None:
+            continue
+        desc_sim = desc_score / 100
+        
         overall_sim = (name_sim * 0.4) + (desc_sim * 0.4) + (loc_sim * 0.2)
         
         if overall_sim > 0.7:
@@ -2203,16 +3464,26 @@ def detect_duplicate_report(new_item, existing_reports):
     
     return duplicates
 
-def smart_search(query, reports):
-    """Natural language search through reports"""
-    query_keywords = extract_keywords(query)
+def smart_search(query_text, reports, texts):
+    """Natural language search through reports
+
+    `query_text` is the query's TextFeatures (None for an empty query) and
+    `texts` the precomputed report features from get_report_texts.
+    """
+    if query_text is None:
+        return []
+    
+    query_keywords = query_text.keyword_ids
     results = []
     
     for report in reports:
-        searchable_text = f"{report['item_name']} {report['description']} {report['location']}"
-        text_keywords = extract_keywords(searchable_text)
-        keyword_matches = len(set(query_keywords).intersection(set(text_keywords)))
-        text_similarity = calculate_similarity(query, searchable_text)
+        searchable_text = texts[report['id']]['searchable']
+        keyword_matches = len(query_keywords & searchable_text.keyword_ids)
+        keyword_score = (keyword_matches / max(len(query_keywords), 1)) * 0.6
+        text_score = bounded_text_similarity(query_text, searchable_text, (0.2 - keyword_score) / 0.4 * 100)
+        if text_score is None:
+            continue
+        text_similarity = text_score / 100
         
         score = (keyword_matches / max(len(query_keywords), 1)) * 0.6 + text_similarity * 0.4
         
@@ -2225,15 +3496,9 @@ def smart_search(query, reports):
     
     results.sort(key=lambda x: x['score'], reverse=True)
     return results[:10]
-# Add category column to database
-def update_db_schema():
-    conn = get_db_connection()
-    try:
-        conn.execute('ALTER TABLE reports ADD COLUMN category TEXT DEFAULT "other"')
-        conn.commit()
-    except sqlite3.OperationalError:
-        pass
-    conn.close()
+
+# Best bm25-ranked reports scored by smart_search
+SMART_SEARCH_CANDIDATES = 200
 
 # Enhanced routes with new NLP features
 @app.route('/smart_search', methods=['POST'])
@@ -2242,10 +3507,19 @@ def smart_search_route():
     query = data.get('query', '')
     
     conn = get_db_connection()
-    reports = conn.execute("SELECT * FROM reports").fetchall()
+    if fts5_available():
+        # Only reports sharing a word with the query are scored
+        words = keyword_tokens(query) or search_words(query)
+        reports = search_reports(conn, sorted(words), SMART_SEARCH_CANDIDATES, any_word=True)
+    else:
+        reports = conn.execute("SELECT * FROM reports").fetchall()
+    texts = get_report_texts(conn, reports)
+    conn.commit()
+    # Query words nobody has used yet cannot match, so they are not interned
+    query_text = build_text_features(conn, query, create=False)
     conn.close()
     
-    results = smart_search(query, reports)
+    results = smart_search(query_text, reports, texts)
     return jsonify(results)
 
 @app.route('/check_duplicates', methods=['POST'])
@@ -2258,10 +3532,19 @@ def check_duplicates():
     }
     
     conn = get_db_connection()
-    existing_reports = conn.execute("SELECT * FROM reports WHERE type = ?", (data.get('type', 'lost'),)).fetchall()
+    # Only reports sharing an LSH bucket with the new item can be near-duplicates
+    existing_reports = candidate_reports(
+        conn, new_item['item_name'], new_item['description'], data.get('type', 'lost')
+    )
+    texts = get_report_texts(conn, existing_reports)
+    conn.commit()
+    new_text = {
+        'item': build_text_features(conn, new_item['item_name'], create=False),
+        'description': build_text_features(conn, new_item['description'], create=False)
+    }
     conn.close()
     
-    duplicates = detect_duplicate_report(new_item, existing_reports)
+    duplicates = detect_duplicate_report(new_item, existing_reports, new_text, texts)
     return jsonify(duplicates)
 
 @app.route('/categorize_item', methods=['POST'])
@@ -2274,33 +3557,62 @@ def categorize_item():
     return jsonify({'category': category})
 
 @app.route('/enhanced_matches')
+@cached_by_data_version
 def enhanced_matches():
-    conn = get_db_connection()
-    lost_items = conn.execute("SELECT * FROM reports WHERE type = 'lost'").fetchall()
-    found_items = conn.execute("SELECT * FROM reports WHERE type = 'found'").fetchall()
-    
-    matches = []
+    if request.args.get('mode') == 'tfidf' and tfidf_available():
+        limit = request.args.get('limit', type=int)
+        conn = get_db_connection()
+        if wants_ndjson() and limit is None:
+            # Unranked, each match is sent as soon as it clears the threshold
+            return ndjson_response(conn, ((None, match) for match in tfidf_enhanced_pairs(conn)))
+        try:
+            matches = tfidf_enhanced_matches(conn, limit=limit)
+        finally:
+            conn.close()
+        if wants_ndjson():
+            return Response((json.dumps(match) + '\n' for match in matches), mimetype='application/x-ndjson')
+        return jsonify(matches)
+    return stored_matches_response('enhanced')
+
+def tfidf_enhanced_pairs(conn):
+    """Yield enhanced_matches results scored with TF-IDF cosine, unranked
+
+    Same 0.4/0.4/0.2 weighting and 0.3 cut-off, computed over the active
+    corpus as a blocked sparse matrix product instead of a pair loop.
+    """
+    lost_items = conn.execute("SELECT * FROM reports WHERE type = 'lost' AND status = 'active'").fetchall()
+    found_items = conn.execute("SELECT * FROM reports WHERE type = 'found' AND status = 'active'").fetchall()
+    texts = get_report_texts(conn, list(lost_items) + list(found_items))
+    conn.commit()
     
-    for lost in lost_items:
-        for found in found_items:
-            name_similarity = calculate_similarity(lost['item_name'], found['item_name'])
-            desc_similarity = calculate_similarity(lost['description'], found['description'])
-            loc_similarity = calculate_location_similarity(lost['location'], found['location'])
-            
-            overall_similarity = (name_similarity * 0.4) + (desc_similarity * 0.4) + (loc_similarity * 0.2)
-            
-            if overall_similarity > 0.3:
-                matches.append({
-                    'lost': dict(lost),
-                    'found': dict(found),
-                    'similarity': overall_similarity,
-                    'location_match': loc_similarity > 0.6,
-                    'match_score': f'{int(overall_similarity * 100)}% Match'
-                })
-    
-    matches.sort(key=lambda x: x['similarity'], reverse=True)
-    conn.close()
-    return jsonify(matches)
+    def token_sets(reports, field):
+        return [texts[report['id']][field].token_ids if texts[report['id']][field] else None
+                for report in reports]
+    
+    for lost_index, found_index, name_similarity, desc_similarity in tfidf_pair_scores(
+        token_sets(lost_items, 'item'), token_sets(lost_items, 'description'),
+        token_sets(found_items, 'item'), token_sets(found_items, 'description')
+    ):
+        lost, found = lost_items[lost_index], found_items[found_index]
+        loc_similarity = calculate_location_similarity(lost['location'], found['location'])
+        
+        overall_similarity = (name_similarity * 0.4) + (desc_similarity * 0.4) + (loc_similarity * 0.2)
+        
+        if overall_similarity > 0.3:
+            yield {
+                'lost': dict(lost),
+                'found': dict(found),
+                'similarity': overall_similarity,
+                'location_match': loc_similarity > 0.6,
+                'match_score': f'{int(overall_similarity * 100)}% Match'
+            }
+
+def tfidf_enhanced_matches(conn, limit=None):
+    """TF-IDF enhanced matches best first, keeping only the top `limit` in a heap"""
+    matches = tfidf_enhanced_pairs(conn)
+    if limit is not None:
+        return heapq.nlargest(max(limit, 0), matches, key=lambda x: x['similarity'])
+    return sorted(matches, key=lambda x: x['similarity'], reverse=True)
 @app.route('/smart_search_page')
 def smart_search_page():
     return render_template('smart_search.html')
@@ -2310,29 +3622,69 @@ def calculate_image_similarity(features1, features2):
     """Backward compatibility wrapper"""
     return 0.0
 
-def detect_duplicate_image(image_path, existing_images):
-    """Detect if uploaded image is duplicate or original"""
-    try:
-        new_features = extract_image_features(image_path)
-        if not new_features:
-            return {'is_duplicate': False, 'confidence': 0}
-        
-        for existing_path in existing_images:
-            if os.path.exists(existing_path):
-                existing_features = extract_image_features(existing_path)
-                if existing_features:
-                    similarity = calculate_image_similarity(new_features, existing_features)
-                    
-                    if similarity > 0.95:
-                        return {
-                            'is_duplicate': True,
-                            'confidence': similarity,
-                            'duplicate_path': existing_path
-                        }
-        
-        return {'is_duplicate': False, 'confidence': 0}
-        
-    except Exception as e:
-        return {'is_duplicate': False, 'confidence': 0}
+def detect_duplicate_image(conn, sha256):
+    """Detect if an uploaded image is a duplicate, by content hash lookup"""
+    filename = find_upload(conn, sha256)
+    if filename:
+        report = conn.execute("SELECT id FROM reports WHERE image_filename = ? LIMIT 1", (filename,)).fetchone()
+        if report:
+            return {
+                'is_duplicate': True,
+                'confidence': 1.0,
+                'duplicate_path': os.path.join(app.config['UPLOAD_FOLDER'], filename),
+                'report_id': report['id']
+            }
+    
+    return {'is_duplicate': False, 'confidence': 0}
+
+# Initialize database when module loads
+init_db()
 
+def resume_image_jobs(inline=False):
+    """Requeue image jobs no live worker is running and return how many were queued
 
+    Called once at server start, not on import: pending jobs are queued
+    again (claiming makes a job that is already queued elsewhere run once)
+    and processing jobs older than IMAGE_JOB_LEASE are taken to have lost
+    their worker. Jobs the pool cannot take stay pending for the next start
+    unless `inline` is set.
+    """
+    conn = get_db_connection()
+    stale = datetime.now() - timedelta(seconds=app.config['IMAGE_JOB_LEASE'])
+    conn.execute("""
+        UPDATE image_jobs SET status = 'pending', updated_at = ?
+        WHERE status = 'processing' AND updated_at < ?
+    """, (datetime.now(), stale))
+    conn.commit()
+    report_ids = [row['report_id'] for row in conn.execute(
+        "SELECT report_id FROM image_jobs WHERE status = 'pending' ORDER BY report_id"
+    )]
+    conn.close()
+    queued = 0
+    for report_id in report_ids:
+        if image_pool.submit(report_id):
+            queued += 1
+        elif inline:
+            process_report_image(report_id)
+    return queued
+
+@app.cli.command('resume-image-jobs')
+def resume_image_jobs_command():
+    """Finish image jobs left by stopped workers, e.g. from a deploy hook"""
+    resume_image_jobs(inline=True)
+    image_pool.join()
+
+@app.cli.command('rebuild-matches')
+@click.option('--workers', type=int, default=None, help='Scoring processes, MATCH_WORKERS by default')
+def rebuild_matches_command(workers):
+    """Rescore every active pair offline, e.g. after upgrading a database"""
+    start_time = time.time()
+    conn = get_db_connection()
+    rebuild_matches(conn, workers=workers or app.config['MATCH_WORKERS'])
+    total = conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+    conn.close()
+    click.echo(f"{total} matches in {time.time() - start_time:.2f}s")
+
+if __name__ == '__main__':
+    resume_image_jobs()
+    app.run(debug=True)
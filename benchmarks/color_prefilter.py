@@ -0,0 +1,80 @@
+# Benchmark: colour bucket pre-filter, pruning against recall
+# Usage: python benchmarks/color_prefilter.py [images_per_side]
+#
+# Fills a scratch database with synthetic lost and found photos (a base
+# colour with a few shapes of nearby colours), then for each
+# IMAGE_COLOR_LEVELS setting prints how many of the perceptual hash pairs the
+# colour buckets keep, how many of the pairs the image matcher reports (15%)
+# and of those above 60% are still scanned, and the time to pick and scan.
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LEVELS = [0, 2, 4, 8, 16, 32]
+
+def make_image(rng):
+    from PIL import Image, ImageDraw
+    base = tuple(rng.randrange(256) for _ in range(3))
+    image = Image.new('RGB', (400, 300), base)
+    draw = ImageDraw.Draw(image)
+    for _ in range(rng.randrange(1, 5)):
+        x, y = rng.randrange(300), rng.randrange(200)
+        draw.rectangle([x, y, x + rng.randrange(20, 150), y + rng.randrange(20, 150)],
+                       fill=tuple(min(255, max(0, channel + rng.randrange(-60, 60))) for channel in base))
+    return image
+
+def main():
+    images_per_side = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    # app.py creates its database and upload folder in the working directory
+    os.chdir(tempfile.mkdtemp())
+    import app
+
+    rng = random.Random(7)
+    conn = app.get_db_connection()
+    reports = {'lost': [], 'found': []}
+    for index in range(images_per_side):
+        for report_type in ('lost', 'found'):
+            filename = f'{report_type}{index}.png'
+            make_image(rng).save(os.path.join(app.app.config['UPLOAD_FOLDER'], filename))
+            report_id = conn.execute("""
+                INSERT INTO reports (name, email, phone, item_name, description, location, image_filename, date_reported, type)
+                VALUES ('T', ?, '9876543210', 'bag', 'bag', 'library', ?, '2026-01-01 00:00:00', ?)
+            """, (f'{report_type}{index}@klu.ac.in', filename, report_type)).lastrowid
+            reports[report_type].append(conn.execute("SELECT * FROM reports WHERE id = ?", (report_id,)).fetchone())
+    conn.commit()
+    lost, found = reports['lost'], reports['found']
+
+    # Index hashes, colours and feature rows once, outside the timings
+    app.app.config['IMAGE_COLOR_LEVELS'] = 1
+    app.image_neighbour_pairs(conn, lost, found)
+    images = app.get_match_images(conn, lost + found)
+    conn.commit()
+
+    app.app.config['IMAGE_COLOR_LEVELS'] = 0
+    hash_pairs = app.image_neighbour_pairs(conn, lost, found)
+    scans = app.batch_image_percentages(images, hash_pairs)
+    reported = {pair for pair, percentage in scans.items() if percentage >= 15}
+    close = {pair for pair, percentage in scans.items() if percentage > 60}
+
+    print(f"images: {images_per_side} lost x {images_per_side} found, {len(hash_pairs)} hash pairs, "
+          f"{len(reported)} reported (>= 15%), {len(close)} above 60%")
+    for levels in LEVELS:
+        app.app.config['IMAGE_COLOR_LEVELS'] = levels
+        start = time.perf_counter()
+        kept = app.image_neighbour_pairs(conn, lost, found)
+        app.batch_image_percentages(images, kept)
+        elapsed = time.perf_counter() - start
+
+        print(f"levels {levels:>2}: kept {len(kept) / max(len(hash_pairs), 1):6.1%}  "
+              f"reported kept {len(kept & reported) / max(len(reported), 1):6.1%}  "
+              f"above 60% kept {len(kept & close) / max(len(close), 1):6.1%}  {elapsed * 1000:7.1f} ms")
+    conn.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# Benchmark: full match rebuild across worker counts
+# Usage: python benchmarks/parallel_matching.py [reports_per_side] [max_workers]
+#
+# Fills a scratch database with synthetic lost and found reports, runs
+# rebuild_matches with 1, 2, 4, ... max_workers processes, checks that every
+# run stores the same matches, and prints the wall time and speedup of each.
+#
+# Measured so far only on a 1-CPU host (300 lost x 300 found, 49571 matches):
+#   workers  1:  25.88s  speedup 1.0x
+#   workers  2:  27.28s  speedup 0.9x
+#   workers  4:  21.99s  speedup 1.2x
+# That shows every worker count stores the same matches and the spawned pool
+# costs little, not any scaling; the speedup on a multi-core host has not
+# been measured yet.
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_similarity import ITEMS, COLORS, BRANDS, DETAILS
+
+LOCATIONS = ['library', 'canteen', 'main block', 'hostel', 'sports complex', 'parking lot', 'lab 3']
+
+def make_report(rng, report_type, day):
+    item = rng.choice(ITEMS)
+    return (
+        f"user{rng.randrange(500)}", f"user{rng.randrange(500)}@klu.ac.in", '9876543210',
+        f"{rng.choice(COLORS)} {item}",
+        f"{rng.choice(BRANDS)} {item} {rng.choice(DETAILS)}",
+        rng.choice(LOCATIONS),
+        None,
+        datetime(2024, 1, 1) + timedelta(minutes=day),
+        report_type
+    )
+
+def main():
+    reports_per_side = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    # app.py creates its database and upload folder in the working directory
+    os.chdir(tempfile.mkdtemp())
+    from app import get_db_connection, rebuild_matches, save_report_text
+
+    rng = random.Random(7)
+    conn = get_db_connection()
+    for index in range(reports_per_side * 2):
+        conn.execute("""
+            INSERT INTO reports (name, email, phone, item_name, description, location, image_filename, date_reported, type)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, make_report(rng, 'lost' if index % 2 else 'found', index))
+    for report in conn.execute("SELECT * FROM reports").fetchall():
+        save_report_text(conn, report)
+    conn.commit()
+
+    print(f"reports: {reports_per_side} lost x {reports_per_side} found, {os.cpu_count()} cpus")
+    baseline = None
+    serial_time = None
+    workers = 1
+    while workers <= max_workers:
+        start = time.perf_counter()
+        rebuild_matches(conn, workers=workers)
+        elapsed = time.perf_counter() - start
+
+        stored = conn.execute("""
+            SELECT lost_report_id, found_report_id, match_kind, similarity_score, details
+            FROM matches ORDER BY lost_report_id, found_report_id, match_kind
+        """).fetchall()
+        stored = [tuple(row) for row in stored]
+        if baseline is None:
+            baseline, serial_time = stored, elapsed
+        assert stored == baseline, f"{workers} workers stored different matches"
+
+        print(f"workers {workers:>2}: {elapsed:7.2f}s  speedup {serial_time / elapsed:4.1f}x  ({len(stored)} matches)")
+        workers *= 2
+    conn.close()
+
+if __name__ == '__main__':
+    main()
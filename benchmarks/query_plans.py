@@ -0,0 +1,89 @@
+# Check: the per-user, most-recent-first and keyset page queries use an index
+# Usage: python benchmarks/query_plans.py [database]
+# tests/test_query_plans.py runs the same check.
+#
+# Runs EXPLAIN QUERY PLAN for each query against a migrated database (a
+# scratch one by default) and fails when a query scans its table without an
+# index or sorts in a temporary b-tree.
+
+import os
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# (route, query, parameters), as the routes issue them
+QUERIES = [
+    ('my_reports', "SELECT * FROM reports WHERE email = ? ORDER BY date_reported DESC", ('a@klu.ac.in',)),
+    ('user_stats', "SELECT COUNT(*) as count FROM reports WHERE email = ? AND type = 'lost'", ('a@klu.ac.in',)),
+    ('user_stats', "SELECT COALESCE(SUM(tokens), 0) as total FROM rewards WHERE finder_email = ?", ('a@klu.ac.in',)),
+    ('admin_reports', "SELECT * FROM reports ORDER BY date_reported DESC", ()),
+    ('live_feed', "SELECT *, 'report' as activity_type FROM reports ORDER BY date_reported DESC LIMIT 10", ()),
+    ('live_feed', "SELECT *, 'reward' as activity_type FROM rewards ORDER BY created_at DESC LIMIT 5", ()),
+    ('update_matches_for_report', """
+        SELECT * FROM reports
+        WHERE type = ? AND status = 'active' AND id < ?
+        ORDER BY date_reported DESC
+    """, ('found', 100)),
+    ('my_notifications', "SELECT * FROM notifications WHERE user_email = ? AND is_read = 0 ORDER BY created_at DESC", ('a@klu.ac.in',)),
+    ('unread_notifications_count', "SELECT COUNT(*) as count FROM notifications WHERE user_email = ? AND is_read = 0", ('a@klu.ac.in',)),
+    ('notification_history', "SELECT * FROM notifications WHERE user_email = ? ORDER BY created_at DESC", ('a@klu.ac.in',)),
+    ('my_rewards', "SELECT * FROM rewards WHERE finder_email = ? ORDER BY created_at DESC", ('a@klu.ac.in',)),
+    ('admin_reports', """
+        SELECT * FROM reports WHERE 1 AND (date_reported, id) < (?, ?)
+        ORDER BY date_reported DESC, id DESC LIMIT ?
+    """, ('2026-01-01 00:00:00', 100, 51)),
+    ('my_reports', """
+        SELECT * FROM reports WHERE email = ? AND (date_reported, id) < (?, ?)
+        ORDER BY date_reported DESC, id DESC LIMIT ?
+    """, ('a@klu.ac.in', '2026-01-01 00:00:00', 100, 51)),
+    ('debug_ai_data', """
+        SELECT * FROM reports WHERE type = 'lost' AND (date_reported, id) < (?, ?)
+        ORDER BY date_reported DESC, id DESC LIMIT ?
+    """, ('2026-01-01 00:00:00', 100, 51)),
+    ('notification_history', """
+        SELECT * FROM notifications WHERE user_email = ? AND (created_at, id) < (?, ?)
+        ORDER BY created_at DESC, id DESC LIMIT ?
+    """, ('a@klu.ac.in', '2026-01-01 00:00:00', 100, 51)),
+    ('my_rewards', """
+        SELECT * FROM rewards WHERE finder_email = ? AND (created_at, id) < (?, ?)
+        ORDER BY created_at DESC, id DESC LIMIT ?
+    """, ('a@klu.ac.in', '2026-01-01 00:00:00', 100, 51)),
+    ('check_reward_given', """
+        SELECT COUNT(*) as count FROM rewards
+        WHERE giver_email = ? AND finder_email = ? AND item_name = ?
+    """, ('a@klu.ac.in', 'b@klu.ac.in', 'wallet')),
+]
+
+def plan_problems(plan):
+    """Plan lines showing an unindexed table scan or a sort"""
+    return [detail for detail in plan
+            if (detail.startswith('SCAN ') and ' USING ' not in detail) or 'TEMP B-TREE' in detail]
+
+def query_plans(conn):
+    """(route, plan lines) for every query in QUERIES"""
+    return [(route, [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params)])
+            for route, query, params in QUERIES]
+
+def main():
+    if len(sys.argv) > 1:
+        conn = sqlite3.connect(sys.argv[1])
+        from migrations import migrate
+        migrate(conn)
+    else:
+        # app.py creates and migrates its database in the working directory
+        os.chdir(tempfile.mkdtemp())
+        from app import get_db_connection
+        conn = get_db_connection()
+
+    failures = 0
+    for route, plan in query_plans(conn):
+        problems = plan_problems(plan)
+        failures += bool(problems)
+        print(f"{'FAIL' if problems else 'ok':4}  {route:28} {' / '.join(plan)}")
+    conn.close()
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
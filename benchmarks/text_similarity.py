@@ -0,0 +1,61 @@
+# Benchmark: full vs threshold-aware text similarity
+# Usage: python benchmarks/text_similarity.py [reports_per_side] [sampled_pairs]
+#
+# Scores a random sample of lost x found pairs both ways, checks that every
+# pair the bounded scorer keeps has the same score, and extrapolates the
+# timings to the full reports_per_side x reports_per_side cross product.
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ITEMS = ['phone', 'wallet', 'keys', 'laptop', 'backpack', 'water bottle', 'umbrella', 'watch',
+         'id card', 'headphones', 'charger', 'notebook', 'jacket', 'calculator', 'earbuds']
+COLORS = ['red', 'blue', 'green', 'black', 'white', 'brown', 'gray', 'silver']
+BRANDS = ['apple', 'samsung', 'nike', 'sony', 'hp', 'dell', 'boat', 'casio']
+DETAILS = ['with a scratch on the back', 'has a sticker', 'small dent near corner',
+           'left near the table', 'with my name written inside', 'cover is cracked',
+           'keychain attached', 'in a leather case', 'lost during the exam']
+
+def make_report(rng):
+    item = rng.choice(ITEMS)
+    return f"{item} {rng.choice(COLORS)} {rng.choice(BRANDS)} {item} {rng.choice(DETAILS)}"
+
+def main():
+    reports_per_side = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    sampled_pairs = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    # app.py creates its database and upload folder in the working directory
+    os.chdir(tempfile.mkdtemp())
+    from app import calculate_nlp_text_similarity, bounded_text_similarity
+
+    rng = random.Random(42)
+    lost = [make_report(rng) for _ in range(reports_per_side)]
+    found = [make_report(rng) for _ in range(reports_per_side)]
+    pairs = [(rng.choice(lost), rng.choice(found)) for _ in range(sampled_pairs)]
+
+    start = time.perf_counter()
+    full = [calculate_nlp_text_similarity(a, b) for a, b in pairs]
+    full_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bounded = [bounded_text_similarity(a, b, 30) for a, b in pairs]
+    bounded_time = time.perf_counter() - start
+
+    for exact, fast in zip(full, bounded):
+        assert (fast is None and exact < 30) or fast == exact
+
+    scale = reports_per_side * reports_per_side / sampled_pairs
+    pruned = sum(score is None for score in bounded)
+    print(f"pairs sampled:      {sampled_pairs} of {reports_per_side}x{reports_per_side}")
+    print(f"pruned by bounds:   {pruned} ({pruned / sampled_pairs:.1%})")
+    print(f"full ratio:         {full_time:.2f}s  (~{full_time * scale / 3600:.1f}h for all pairs)")
+    print(f"threshold-aware:    {bounded_time:.2f}s  (~{bounded_time * scale / 3600:.1f}h for all pairs)")
+    print(f"speedup:            {full_time / bounded_time:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# Dominant-colour buckets as a cheap pre-filter for the image scan
+# Each image's few dominant colours are found once by median cut over a small
+# thumbnail of its analysis copy and stored. Colours are quantized into
+# levels x levels x levels RGB buckets at query time, and a pair is only worth
+# scanning when some colour of one image is within MAX_CHANNEL_DIFF on every
+# channel (up to bucket rounding) of a colour of the other. Callers add the
+# scan's mean colour to the dominant ones, so no pair with a non-zero colour
+# similarity is dropped.
+
+from PIL import Image
+
+from db_pool import select_in
+
+DOMINANT_COLORS = 3
+# Colours covering less of the thumbnail than this do not count as dominant
+MIN_SHARE = 0.1
+_THUMBNAIL_SIZE = (64, 64)
+# mean_color_similarity in app.py scores 0 beyond this difference on any channel
+MAX_CHANNEL_DIFF = 100
+
+def dominant_colors(image):
+    """[(r, g, b, share)] for an image's dominant colours, largest share first"""
+    thumbnail = image.convert('RGB').resize(_THUMBNAIL_SIZE, Image.BILINEAR)
+    quantized = thumbnail.quantize(colors=DOMINANT_COLORS, method=Image.MEDIANCUT)
+    palette = quantized.getpalette()
+    total = _THUMBNAIL_SIZE[0] * _THUMBNAIL_SIZE[1]
+    colors = []
+    for count, index in sorted(quantized.getcolors(), reverse=True):
+        if count / total >= MIN_SHARE:
+            colors.append((*palette[index * 3:index * 3 + 3], count / total))
+    return colors
+
+def color_bucket(r, g, b, levels):
+    return (int(r * levels // 256), int(g * levels // 256), int(b * levels // 256))
+
+def bucket_reach(levels):
+    """Bucket steps covering MAX_CHANNEL_DIFF, so no colour within it is missed"""
+    return MAX_CHANNEL_DIFF * levels // 256 + 1
+
+def near_color_pairs(lost_colors, found_colors, levels):
+    """(lost_id, found_id) pairs with colours within bucket_reach() buckets
+
+    Both arguments map report id -> [(r, g, b, share)].
+    """
+    def buckets(colors):
+        ids = {}
+        for report_id, report_colors in colors.items():
+            for r, g, b, _ in report_colors:
+                ids.setdefault(color_bucket(r, g, b, levels), set()).add(report_id)
+        return ids
+
+    # Occupied buckets only, a fine grid has far more neighbours than colours
+    reach = bucket_reach(levels)
+    found_buckets = buckets(found_colors)
+    pairs = set()
+    for lost_bucket, lost_ids in buckets(lost_colors).items():
+        for found_bucket, found_ids in found_buckets.items():
+            if all(abs(lost - found) <= reach for lost, found in zip(lost_bucket, found_bucket)):
+                pairs.update((lost_id, found_id) for lost_id in lost_ids for found_id in found_ids)
+    return pairs
+
+def index_colors(conn, report_id, image_path):
+    """Compute and store a report's dominant colours, None if the image cannot be read"""
+    try:
+        with Image.open(image_path) as image:
+            colors = dominant_colors(image)
+    except (OSError, ValueError):
+        return None
+    conn.execute("DELETE FROM image_colors WHERE report_id = ?", (report_id,))
+    conn.executemany("""
+        INSERT INTO image_colors (report_id, rank, r, g, b, share) VALUES (?, ?, ?, ?, ?, ?)
+    """, [(report_id, rank, r, g, b, share) for rank, (r, g, b, share) in enumerate(colors)])
+    return colors
+
+def load_image_colors(conn, report_ids):
+    """{report_id: [(r, g, b, share)]} for the reports that have colours"""
+    colors = {}
+    for report_id, r, g, b, share in select_in(conn, """
+        SELECT report_id, r, g, b, share FROM image_colors
+        WHERE report_id IN ({placeholders})
+        ORDER BY report_id, rank
+    """, report_ids):
+        colors.setdefault(report_id, []).append((r, g, b, share))
+    return colors
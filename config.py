@@ -15,6 +15,21 @@ class Config:
     UPLOAD_FOLDER = 'static/uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024
     
+    # Matching Settings
+    MATCH_WORKERS = int(os.environ.get('MATCH_WORKERS') or 1)  # processes for `flask rebuild-matches`
+    IMAGE_HASH_RADIUS = int(os.environ.get('IMAGE_HASH_RADIUS') or 10)  # dHash/pHash bits for image scan candidates
+    IMAGE_COLOR_LEVELS = int(os.environ.get('IMAGE_COLOR_LEVELS') or 0)  # colour buckets per channel for image scan candidates, 0 (default) disables (see benchmarks/color_prefilter.py)
+    RESULT_CACHE_SIZE = int(os.environ.get('RESULT_CACHE_SIZE') or 128)  # cached match/report responses
+    IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS') or 2)  # background threads for upload image jobs, 0 runs them inline
+    IMAGE_QUEUE_SIZE = int(os.environ.get('IMAGE_QUEUE_SIZE') or 64)  # queued image jobs before uploads process inline
+    IMAGE_JOB_LEASE = int(os.environ.get('IMAGE_JOB_LEASE') or 600)  # seconds before a processing image job counts as abandoned
+    SCAN_CACHE_SIZE = int(os.environ.get('SCAN_CACHE_SIZE') or 10000)  # cached /scan_images results
+    FEATURE_STORE_FOLDER = os.environ.get('FEATURE_STORE_FOLDER') or os.path.join('instance', 'feature_store')  # memory-mapped image features, not served
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 8)  # idle SQLite connections kept for requests
+    DB_BUSY_TIMEOUT = float(os.environ.get('DB_BUSY_TIMEOUT') or 5)  # seconds a connection waits on a locked database
+    PAGE_SIZE = int(os.environ.get('PAGE_SIZE') or 50)  # rows per page of report, notification and reward lists
+    MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE') or 500)  # largest ?limit= accepted
+    
     # Email Validation Settings
     AUTHORIZED_EMAIL_DOMAINS = ['klu.ac.in', 'kluniversity.in', 'admin.klu.ac.in', 'gmail.com']
     REQUIRE_EMAIL_VERIFICATION = True
@@ -0,0 +1,111 @@
+# Pooled, tuned SQLite connections
+# Opening a connection re-reads the schema and starts with a cold page cache
+# and an empty statement cache, so request handlers borrow an already open
+# connection instead. Every connection runs in WAL mode, where readers no
+# longer wait on a writer's file lock, with synchronous=NORMAL (durable at
+# checkpoints, safe against corruption), a busy timeout instead of immediate
+# "database is locked" errors, a shared memory map of the file and a larger
+# page cache. sqlite3 keeps compiled statements per connection
+# (cached_statements), which is only worth it while the connection lives on.
+
+import os
+import sqlite3
+import threading
+
+# Bytes of the database file mapped into memory, per connection (shared pages)
+MMAP_SIZE = 256 * 1024 * 1024
+# Page cache per connection, negative is KiB
+CACHE_SIZE = -16000
+# Compiled statements kept per connection
+CACHED_STATEMENTS = 256
+# Values bound per IN (...) list, well below SQLite's variable limit
+IN_CHUNK_SIZE = 500
+
+class PooledConnection(sqlite3.Connection):
+    """Connection whose close() hands it back instead of closing it
+
+    A request may borrow the same connection several times (helpers open
+    their own "connection"); close() only rolls back uncommitted work once
+    the last borrower has closed, like closing a real connection would.
+    """
+
+    pooled = False
+    borrowers = 0
+
+    def close(self):
+        if not self.pooled:
+            return super().close()
+        self.borrowers = max(0, self.borrowers - 1)
+        if not self.borrowers and self.in_transaction:
+            self.rollback()
+
+    def discard(self):
+        self.pooled = False
+        super().close()
+
+def select_in(conn, query, values, chunk_size=IN_CHUNK_SIZE):
+    """Rows of `query` for every value, its {placeholders} filled in one chunk of values at a time"""
+    values = list(values)
+    for start in range(0, len(values), chunk_size):
+        chunk = values[start:start + chunk_size]
+        yield from conn.execute(query.format(placeholders=','.join('?' * len(chunk))), chunk)
+
+def connect(path, busy_timeout=5.0, shared=False):
+    """New connection with the pragmas above
+
+    shared connections may be used from any thread, one at a time.
+    """
+    conn = sqlite3.connect(path, timeout=busy_timeout, factory=PooledConnection,
+                           cached_statements=CACHED_STATEMENTS, check_same_thread=not shared)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout * 1000)}")
+    conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = {CACHE_SIZE}")
+    return conn
+
+class ConnectionPool:
+    """Idle connections to one database, at most max_idle are kept
+
+    Connections are not shared across processes, a forked child starts with
+    an empty pool.
+    """
+
+    def __init__(self, path, max_idle=8, busy_timeout=5.0):
+        self.path = path
+        self.max_idle = max_idle
+        self.busy_timeout = busy_timeout
+        self.idle = []
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        conn = None
+        with self.lock:
+            if self.pid != os.getpid():
+                # The parent's connections are not ours to use or close
+                self.idle = []
+                self.pid = os.getpid()
+            if self.idle:
+                conn = self.idle.pop()
+        if conn is None:
+            conn = connect(self.path, self.busy_timeout, shared=True)
+        conn.pooled = True
+        conn.borrowers = 0
+        return conn
+
+    def release(self, conn):
+        """Return a connection, rolling back whatever its borrowers left uncommitted"""
+        conn.borrowers = 0
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.discard()
+            return
+        with self.lock:
+            if self.pid == os.getpid() and len(self.idle) < self.max_idle:
+                self.idle.append(conn)
+                return
+        conn.discard()
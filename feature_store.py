@@ -0,0 +1,147 @@
+# Memory-mapped image feature store
+# The batch image kernel's inputs for every image are kept in an append-only
+# file of fixed-width rows. Each process maps it read-only, so worker
+# processes share one copy through the page cache instead of each loading
+# its own, and the kernel reads columns of the mapping directly. Rows are
+# appended under an exclusive file lock and never rewritten; which report
+# owns which row is kept in SQLite (image_store_rows). Clearing the store
+# replaces the file, processes still mapping the old one remap on next use.
+# Requires: pip install numpy
+
+import os
+import threading
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from db_pool import select_in
+from file_utils import atomic_write
+from image_kernel import HISTOGRAM_BINS_USED, record_arrays
+
+# content_hash and size for the file comparison scorer, the rest as record_arrays() returns it
+ROW_DTYPE = np.dtype([
+    ('content_hash', 'S32'),
+    ('size', '<u8'),
+    ('histogram', '<f8', (HISTOGRAM_BINS_USED,)),
+    ('mean_rgb', '<f8', (3,)),
+    ('luminance', '<f8'),
+    ('key', '<u8')
+]) if np is not None else None
+
+# What the matchers need per image when its features live in a store
+StoredImage = namedtuple('StoredImage', ['content_hash', 'size', 'row'])
+
+def store_available():
+    return np is not None
+
+class FeatureStore:
+    """One append-only feature file and its read-only mapping"""
+
+    def __init__(self, path):
+        self.path = path
+        self.table = None
+        self.inode = None
+        self.lock = threading.Lock()
+
+    def _open_locked(self):
+        """Descriptor of the current file, under an exclusive lock"""
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if not fcntl:
+                return fd
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            # clear() may have replaced the file while this waited for the lock
+            if os.fstat(fd).st_ino == os.stat(self.path).st_ino:
+                return fd
+            os.close(fd)
+
+    def append(self, record):
+        """Append an ImageRecord's row and return its row number"""
+        histograms, means, luminance, keys = record_arrays([record])
+        row = np.zeros(1, dtype=ROW_DTYPE)
+        row['content_hash'] = record.content_hash
+        row['size'] = record.size
+        row['histogram'] = histograms
+        row['mean_rgb'] = means
+        row['luminance'] = luminance
+        row['key'] = keys
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self.lock:
+            fd = self._open_locked()
+            try:
+                # A torn row from a crashed writer is overwritten
+                position = os.fstat(fd).st_size // ROW_DTYPE.itemsize
+                os.pwrite(fd, row.tobytes(), position * ROW_DTYPE.itemsize)
+            finally:
+                os.close(fd)
+        return position
+
+    def clear(self):
+        """Replace the file with an empty one, once no report owns a row"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self.lock:
+            fd = self._open_locked()
+            try:
+                with atomic_write(self.path):
+                    pass
+            finally:
+                os.close(fd)
+            self.table = None
+
+    def view(self, min_rows=0):
+        """Read-only mapping of every complete row, remapped when other writers have appended or cleared"""
+        with self.lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                stat = None
+            inode = stat.st_ino if stat else None
+            if self.table is None or len(self.table) < min_rows or inode != self.inode:
+                rows = stat.st_size // ROW_DTYPE.itemsize if stat else 0
+                if rows:
+                    self.table = np.memmap(self.path, dtype=ROW_DTYPE, mode='r', shape=(rows,))
+                else:
+                    self.table = np.zeros(0, dtype=ROW_DTYPE)
+                self.inode = inode
+            return self.table
+
+    def images(self, rows):
+        """{report_id: StoredImage} for a {report_id: row} mapping"""
+        table = self.view(max(rows.values(), default=-1) + 1)
+        # tobytes() keeps trailing zero bytes that indexing an S32 field would strip
+        return {report_id: StoredImage(table['content_hash'][row:row + 1].tobytes(), int(table['size'][row]), row)
+                for report_id, row in rows.items()}
+
+    def arrays(self, rows):
+        """record_arrays() tuple for `rows`, in the order given
+
+        A run of consecutive rows is a zero-copy view of the mapping; other
+        selections are gathered.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        table = self.view(int(rows.max()) + 1 if len(rows) else 0)
+        if len(rows) and (np.diff(rows) == 1).all():
+            table = table[rows[0]:rows[-1] + 1]
+        else:
+            table = table[rows]
+        return table['histogram'], table['mean_rgb'], table['luminance'], table['key']
+
+def load_store_rows(conn, report_ids):
+    """{report_id: row} for the reports that have a feature store row"""
+    return dict(select_in(conn, """
+        SELECT report_id, row FROM image_store_rows WHERE report_id IN ({placeholders})
+    """, report_ids))
+
+def save_store_row(conn, report_id, row):
+    conn.execute("""
+        INSERT OR REPLACE INTO image_store_rows (report_id, row) VALUES (?, ?)
+    """, (report_id, row))
@@ -0,0 +1,24 @@
+# File helpers shared by the image caches
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+@contextmanager
+def atomic_write(path):
+    """Binary file that replaces `path` only once the block completes
+
+    The content is written aside and renamed over `path`, so a reader or a
+    concurrent writer of the same file never sees it half written.
+    """
+    folder = os.path.dirname(path) or '.'
+    os.makedirs(folder, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=folder, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            yield out
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -0,0 +1,107 @@
+# Per-image feature records for the image matchers
+# Everything the pair scorers need from an image is computed once when it is
+# uploaded and stored as one fixed-size binary record, so scoring a pair reads
+# two records instead of opening and decoding two image files.
+# Pixels come from a small analysis copy of the upload, derived once with
+# reduced-scale JPEG decoding, so no scanner decodes the full-size original.
+
+import hashlib
+import os
+import struct
+from array import array
+from collections import namedtuple
+from PIL import Image, ImageStat
+
+from db_pool import select_in
+from file_utils import atomic_write
+
+# Scans compare 128x128 nearest-neighbour thumbnails (see advanced_computer_vision_scan)
+SCAN_SIZE = (128, 128)
+HISTOGRAM_BINS = 768
+
+# Longest side of the analysis copy, enough for every scanner (the OpenCV one uses 300x300)
+ANALYSIS_SIZE = 320
+# Kept outside the served static folder
+ANALYSIS_FOLDER = os.path.join('instance', 'analysis')
+
+# content_hash: SHA-256 of the file bytes
+# size: file size in bytes
+# histogram: RGB histogram counts of the scan thumbnail (sums to 3 * 128 * 128)
+# mean_rgb: per-channel mean of the thumbnail
+# luminance, contrast: mean and standard deviation of its grayscale version
+ImageRecord = namedtuple('ImageRecord', ['content_hash', 'size', 'histogram', 'mean_rgb', 'luminance', 'contrast'])
+
+_HEADER = struct.Struct('<32sQ5d')
+
+def analysis_path(image_path):
+    """Where the analysis copy of an upload lives"""
+    filename = os.path.basename(image_path)
+    return os.path.join(ANALYSIS_FOLDER, os.path.splitext(filename)[0] + '.png')
+
+def derive_analysis_image(image_path):
+    """Write the analysis copy of an upload and return its path
+
+    JPEGs are decoded straight at a 1/2, 1/4 or 1/8 scale that still covers
+    ANALYSIS_SIZE, so a large photo never has to be decoded at full size.
+    """
+    target = analysis_path(image_path)
+    with Image.open(image_path) as image:
+        image.draft('RGB', (ANALYSIS_SIZE, ANALYSIS_SIZE))
+        image = image.convert('RGB')
+        image.thumbnail((ANALYSIS_SIZE, ANALYSIS_SIZE), Image.LANCZOS)
+    # Image workers may derive the same copy concurrently
+    with atomic_write(target) as out:
+        image.save(out, 'PNG', compress_level=1)
+    return target
+
+def compute_image_record(image_path, pixels_path=None, content_hash=None, size=None):
+    """ImageRecord for an image file
+
+    The content hash and size are of `image_path`, read from the file unless
+    already known; pixel statistics are taken from `pixels_path` (the
+    analysis copy) when given.
+    """
+    if content_hash is None:
+        with open(image_path, 'rb') as f:
+            content = f.read()
+        content_hash, size = hashlib.sha256(content).digest(), len(content)
+    with Image.open(pixels_path or image_path) as image:
+        thumbnail = image.convert('RGB').resize(SCAN_SIZE, Image.NEAREST)
+    color_stat = ImageStat.Stat(thumbnail)
+    gray_stat = ImageStat.Stat(thumbnail.convert('L'))
+    return ImageRecord(
+        content_hash,
+        size,
+        tuple(thumbnail.histogram()),
+        tuple(color_stat.mean),
+        gray_stat.mean[0],
+        gray_stat.stddev[0]
+    )
+
+def pack_record(record):
+    """1616-byte little-endian encoding: header, then uint16 histogram counts"""
+    header = _HEADER.pack(record.content_hash, record.size, *record.mean_rgb, record.luminance, record.contrast)
+    return header + array('H', record.histogram).tobytes()
+
+def unpack_record(blob):
+    content_hash, size, r, g, b, luminance, contrast = _HEADER.unpack_from(blob)
+    histogram = array('H')
+    histogram.frombytes(blob[_HEADER.size:])
+    return ImageRecord(content_hash, size, tuple(histogram), (r, g, b), luminance, contrast)
+
+def store_image_record(conn, report_id, image_path, pixels_path=None, content_hash=None, size=None):
+    """Compute and persist a report's image record, None if the image cannot be read"""
+    try:
+        record = compute_image_record(image_path, pixels_path, content_hash, size)
+    except (OSError, ValueError):
+        return None
+    conn.execute("""
+        INSERT OR REPLACE INTO image_features (report_id, record) VALUES (?, ?)
+    """, (report_id, pack_record(record)))
+    return record
+
+def load_image_records(conn, report_ids):
+    """{report_id: ImageRecord} for the reports that have records"""
+    return {report_id: unpack_record(blob) for report_id, blob in select_in(conn, """
+        SELECT report_id, record FROM image_features WHERE report_id IN ({placeholders})
+    """, report_ids)}
@@ -0,0 +1,137 @@
+# Perceptual image hashes and a Hamming index for near-neighbour lookup
+# dHash and pHash are computed once when a report's image is saved. Pairs
+# whose hashes are within a Hamming radius of each other are the only ones
+# the full computer vision scan looks at, and a multi-index hash table over
+# one side finds them without comparing every lost image with every found one.
+
+import math
+from PIL import Image
+
+from db_pool import select_in
+
+HASH_BITS = 64
+_MASK = (1 << HASH_BITS) - 1
+
+# Low-frequency DCT-II basis for pHash: 8 frequencies over 32 samples
+_DCT_SIZE = 32
+_DCT_KEEP = 8
+_COSINES = [
+    [math.cos(math.pi * (2 * x + 1) * u / (2 * _DCT_SIZE)) for x in range(_DCT_SIZE)]
+    for u in range(_DCT_KEEP)
+]
+
+def dhash(image):
+    """Difference hash: is each pixel brighter than its right neighbour, on a 9x8 thumbnail"""
+    pixels = image.convert('L').resize((9, 8), Image.LANCZOS).tobytes()
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+def phash(image):
+    """Perceptual hash: 8x8 lowest DCT frequencies of a 32x32 thumbnail against their median"""
+    pixels = list(image.convert('L').resize((_DCT_SIZE, _DCT_SIZE), Image.LANCZOS).tobytes())
+    rows = [pixels[y * _DCT_SIZE:(y + 1) * _DCT_SIZE] for y in range(_DCT_SIZE)]
+    # Separable transform, rows first
+    row_coeffs = [[sum(p * c for p, c in zip(row, cosines)) for cosines in _COSINES] for row in rows]
+    coeffs = [
+        sum(row_coeffs[y][u] * _COSINES[v][y] for y in range(_DCT_SIZE))
+        for v in range(_DCT_KEEP) for u in range(_DCT_KEEP)
+    ]
+    # The DC term only tracks overall brightness
+    ac = sorted(coeffs[1:])
+    median = ac[len(ac) // 2]
+    value = 0
+    for coeff in coeffs:
+        value = (value << 1) | (coeff > median)
+    return value
+
+def hamming(hash1, hash2):
+    return (hash1 ^ hash2).bit_count()
+
+class HammingIndex:
+    """Multi-index hashing for radius search over 64-bit hashes
+
+    Each hash is split into radius // 2 + 1 substrings with one table per
+    substring. Two hashes within `radius` bits must then agree on some
+    substring to within one bit (pigeonhole), so a search probes every table
+    with the query substring and its one-bit variants and only verifies the
+    full distance on what it finds there.
+    """
+
+    def __init__(self, radius):
+        self.radius = radius
+        chunks = min(radius // 2 + 1, HASH_BITS)
+        # Substring (offset, width) pairs covering all HASH_BITS bits
+        widths = [HASH_BITS // chunks + (i < HASH_BITS % chunks) for i in range(chunks)]
+        self.chunks = [(sum(widths[:i]), width) for i, width in enumerate(widths)]
+        self.chunk_radius = radius // chunks
+        self.tables = [{} for _ in self.chunks]
+        self.hashes = []
+        self.items = []
+
+    def _substrings(self, key):
+        return [(key >> offset) & ((1 << width) - 1) for offset, width in self.chunks]
+
+    def add(self, key, item):
+        position = len(self.hashes)
+        self.hashes.append(key)
+        self.items.append(item)
+        for table, substring in zip(self.tables, self._substrings(key)):
+            table.setdefault(substring, []).append(position)
+
+    def search(self, key):
+        """Items within `radius` of `key`"""
+        positions = set()
+        for table, substring, (_, width) in zip(self.tables, self._substrings(key), self.chunks):
+            positions.update(table.get(substring, ()))
+            if self.chunk_radius:
+                for bit in range(width):
+                    positions.update(table.get(substring ^ (1 << bit), ()))
+        return [self.items[position] for position in positions
+                if (self.hashes[position] ^ key).bit_count() <= self.radius]
+
+def near_image_pairs(lost_hashes, found_hashes, radius):
+    """(lost_id, found_id) pairs whose dHash or pHash are within `radius` bits
+
+    Both arguments map report id -> (dhash, phash).
+    """
+    dhash_index = HammingIndex(radius)
+    phash_index = HammingIndex(radius)
+    for report_id, (d, p) in found_hashes.items():
+        dhash_index.add(d, report_id)
+        phash_index.add(p, report_id)
+
+    pairs = set()
+    for lost_id, (d, p) in lost_hashes.items():
+        for found_id in dhash_index.search(d):
+            pairs.add((lost_id, found_id))
+        for found_id in phash_index.search(p):
+            pairs.add((lost_id, found_id))
+    return pairs
+
+def _to_signed(value):
+    # SQLite integers are signed 64-bit
+    return value - (1 << HASH_BITS) if value >> (HASH_BITS - 1) else value
+
+def index_image(conn, report_id, image_path):
+    """Compute and store a report's image hashes, None if the image cannot be read"""
+    try:
+        with Image.open(image_path) as image:
+            hashes = (dhash(image), phash(image))
+    except (OSError, ValueError):
+        return None
+    conn.execute("""
+        INSERT OR REPLACE INTO image_hashes (report_id, dhash, phash) VALUES (?, ?, ?)
+    """, (report_id, _to_signed(hashes[0]), _to_signed(hashes[1])))
+    return hashes
+
+def load_image_hashes(conn, report_ids):
+    """{report_id: (dhash, phash)} for the reports that have hashes"""
+    hashes = {}
+    for report_id, d, p in select_in(conn, """
+        SELECT report_id, dhash, phash FROM image_hashes WHERE report_id IN ({placeholders})
+    """, report_ids):
+        hashes[report_id] = (d & _MASK, p & _MASK)
+    return hashes
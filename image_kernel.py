@@ -0,0 +1,92 @@
+# Batched image similarity over stored image records
+# Computes the overall percentage of image_record_scan for every lost x found
+# pair at once: chi-square over the histogram bins, mean colour distance and
+# brightness, broadcast over a block of lost rows against all found rows.
+# Every operation mirrors the scalar path step for step (same bin order, same
+# IEEE operations), so the results are bit-for-bit the same.
+# Requires: pip install numpy
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HISTOGRAM_BINS_USED = 128
+
+def kernel_available():
+    return np is not None
+
+def record_arrays(records):
+    """(histograms, mean colours, luminance, content keys) for a list of ImageRecords
+
+    Histograms are the first HISTOGRAM_BINS_USED bins over the full count,
+    as smart_histogram_similarity normalizes them.
+    """
+    counts = np.array([record.histogram for record in records], dtype=np.float64).reshape(len(records), -1)
+    totals = counts.sum(axis=1)
+    totals[totals == 0] = 1
+    histograms = counts[:, :HISTOGRAM_BINS_USED] / totals[:, None]
+    means = np.array([record.mean_rgb for record in records], dtype=np.float64).reshape(len(records), 3)
+    luminance = np.array([record.luminance for record in records], dtype=np.float64)
+    # SHA-256 prefixes, equal keys mean byte-identical files
+    keys = np.array([int.from_bytes(record.content_hash[:8], 'big') for record in records], dtype=np.uint64)
+    return histograms, means, luminance, keys
+
+def histogram_similarity_matrix(lost_histograms, found_histograms):
+    """smart_histogram_similarity for every pair"""
+    chi_square = np.zeros((len(lost_histograms), len(found_histograms)))
+    for bin_index in range(lost_histograms.shape[1]):
+        lost_bin = lost_histograms[:, bin_index, None]
+        found_bin = found_histograms[None, :, bin_index]
+        total = lost_bin + found_bin
+        diff = lost_bin - found_bin
+        occupied = total > 0
+        chi_square += np.where(occupied, (diff * diff) / np.where(occupied, total, 1.0), 0.0)
+
+    similarity = np.minimum(100, np.maximum(0, 100 - (chi_square * 50)))
+    similarity = np.where(chi_square < 0.01, 100.0, similarity)
+    return np.where(chi_square > 2.0, 0.0, similarity)
+
+def color_similarity_matrix(lost_means, found_means):
+    """mean_color_similarity for every pair"""
+    diffs = np.abs(lost_means[:, None, :] - found_means[None, :, :])
+    r_diff, g_diff, b_diff = diffs[..., 0], diffs[..., 1], diffs[..., 2]
+    color_distance = np.sqrt(r_diff * r_diff + g_diff * g_diff + b_diff * b_diff)
+
+    similarity = np.maximum(0, 100 - (color_distance / 150 * 100))
+    similarity = np.where(color_distance < 5, 95.0 + (5 - color_distance), similarity)
+    similarity = np.where(color_distance > 150, 0.0, similarity)
+    similarity = np.where((r_diff > 100) | (g_diff > 100) | (b_diff > 100), 0.0, similarity)
+    return np.where((r_diff <= 2) & (g_diff <= 2) & (b_diff <= 2), 100.0, similarity)
+
+def brightness_similarity_matrix(lost_luminance, found_luminance):
+    """luminance_similarity for every pair"""
+    brightness_diff = np.abs(lost_luminance[:, None] - found_luminance[None, :])
+    return np.maximum(0, 100 - (brightness_diff / 255 * 100))
+
+def overall_percentage_matrix(lost, found):
+    """Unrounded image_record_scan overall percentage for every pair
+
+    `lost` and `found` are record_arrays() tuples. Callers round with
+    round(value, 2) to get the scalar path's reported value.
+    """
+    lost_histograms, lost_means, lost_luminance, lost_keys = lost
+    found_histograms, found_means, found_luminance, found_keys = found
+
+    histogram = histogram_similarity_matrix(lost_histograms, found_histograms)
+    color = color_similarity_matrix(lost_means, found_means)
+    brightness = brightness_similarity_matrix(lost_luminance, found_luminance)
+
+    overall = histogram * 0.4 + color * 0.4 + brightness * 0.2
+    overall = np.where((histogram > 98) & (color > 98) & (brightness > 95), 100.0, overall)
+    overall = np.where(overall < 5, 0.0, overall)
+    overall = np.minimum(100, np.maximum(0, overall))
+    # Completely different images
+    overall = np.where((histogram < 5) & (color < 10) & (brightness < 10), 0.0, overall)
+    return np.where(lost_keys[:, None] == found_keys[None, :], 100.0, overall)
+
+def overall_percentage_blocks(lost, found, block_size=256):
+    """Yield (row_start, block) of overall_percentage_matrix, block_size lost rows at a time"""
+    for start in range(0, len(lost[0]), block_size):
+        stop = start + block_size
+        yield start, overall_percentage_matrix(tuple(array[start:stop] for array in lost), found)
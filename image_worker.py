@@ -0,0 +1,54 @@
+# Background worker pool for upload image processing
+# Upload handlers queue a report id and return; worker threads derive the
+# analysis copy, hashes and feature record and then score the report, so a
+# form submit does not wait on image decoding. PIL and numpy release the GIL
+# for the heavy parts, which is why threads are enough here.
+
+import queue
+import threading
+import traceback
+
+class WorkerPool:
+    """Bounded queue drained by daemon threads calling handler(item)
+
+    With workers=0 nothing is queued and callers process items themselves.
+    """
+
+    def __init__(self, handler, workers=2, max_pending=64):
+        self.handler = handler
+        self.workers = workers
+        self.queue = queue.Queue(max_pending)
+        self.threads = []
+        self.lock = threading.Lock()
+
+    def _start(self):
+        with self.lock:
+            while len(self.threads) < self.workers:
+                thread = threading.Thread(target=self._run, name=f'image-worker-{len(self.threads)}', daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                self.handler(item)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                self.queue.task_done()
+
+    def submit(self, item):
+        """Queue item, False when there are no workers or the queue is full"""
+        if self.workers <= 0:
+            return False
+        self._start()
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            return False
+        return True
+
+    def join(self):
+        """Wait until every queued item has been processed"""
+        self.queue.join()
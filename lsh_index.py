@@ -0,0 +1,83 @@
+# MinHash / LSH index for near-duplicate report lookup
+# Each report gets a MinHash signature over character shingles of its item
+# name and description when it is written. Signatures are split into bands
+# and every band is stored as a bucket key, so finding likely duplicates is
+# an indexed lookup of the buckets a new report falls into rather than a
+# scan of every report. Recall is probabilistic: with 32 bands of 2 rows a
+# pair whose shingle Jaccard is 0.5 collides in some band >99.9% of the time.
+
+import re
+import zlib
+from array import array
+
+NUM_PERMUTATIONS = 64
+BAND_ROWS = 2
+NUM_BANDS = NUM_PERMUTATIONS // BAND_ROWS
+SHINGLE_SIZE = 3
+
+# Fixed universal hash parameters so every worker computes the same signatures
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_PERMUTATIONS = [
+    (
+        zlib.crc32(f'minhash-a-{i}'.encode()) * 2654435761 % _PRIME | 1,
+        zlib.crc32(f'minhash-b-{i}'.encode()) * 40503 % _PRIME
+    )
+    for i in range(NUM_PERMUTATIONS)
+]
+
+def duplicate_text(item_name, description):
+    """Text the duplicate check compares"""
+    return f"{item_name} {description}"
+
+def shingles(text):
+    """Character shingles of the cleaned, whitespace-collapsed text"""
+    clean = ' '.join(re.sub(r'[^a-zA-Z0-9\s]', '', text.lower()).split())
+    if len(clean) < SHINGLE_SIZE:
+        return {clean} if clean else set()
+    return {clean[i:i + SHINGLE_SIZE] for i in range(len(clean) - SHINGLE_SIZE + 1)}
+
+def minhash_signature(text):
+    """NUM_PERMUTATIONS minimum hashes over the shingles of `text`"""
+    hashed = [zlib.crc32(shingle.encode()) for shingle in shingles(text)]
+    if not hashed:
+        return [_MAX_HASH] * NUM_PERMUTATIONS
+    return [min((a * value + b) % _PRIME for value in hashed) & _MAX_HASH for a, b in _PERMUTATIONS]
+
+def band_keys(signature, item_name):
+    """(band, bucket) pairs for a signature, plus one bucket for the item name
+
+    Item name similarity alone carries 40% of the duplicate score, so reports
+    with the same normalized name always land in a shared bucket.
+    """
+    keys = []
+    for band in range(NUM_BANDS):
+        rows = array('I', signature[band * BAND_ROWS:(band + 1) * BAND_ROWS])
+        keys.append((band, zlib.crc32(rows.tobytes())))
+    name = ' '.join(re.sub(r'[^a-zA-Z0-9\s]', '', item_name.lower()).split())
+    keys.append((NUM_BANDS, zlib.crc32(name.encode())))
+    return keys
+
+def index_report(conn, report_id, item_name, description):
+    """Store a report's signature and LSH buckets"""
+    signature = minhash_signature(duplicate_text(item_name, description))
+    conn.execute("DELETE FROM lsh_buckets WHERE report_id = ?", (report_id,))
+    conn.execute("""
+        INSERT OR REPLACE INTO report_minhash (report_id, signature) VALUES (?, ?)
+    """, (report_id, array('I', signature).tobytes()))
+    conn.executemany("""
+        INSERT INTO lsh_buckets (band, bucket, report_id) VALUES (?, ?, ?)
+    """, [(band, bucket, report_id) for band, bucket in band_keys(signature, item_name)])
+
+def candidate_reports(conn, item_name, description, report_type):
+    """Reports of `report_type` sharing at least one LSH bucket with the given text"""
+    keys = band_keys(minhash_signature(duplicate_text(item_name, description)), item_name)
+    values = ','.join('(?, ?)' for _ in keys)
+    params = [value for key in keys for value in key]
+    return conn.execute(f"""
+        SELECT * FROM reports
+        WHERE type = ? AND id IN (
+            SELECT report_id FROM lsh_buckets WHERE (band, bucket) IN (VALUES {values})
+        )
+        ORDER BY id
+    """, [report_type] + params).fetchall()
@@ -0,0 +1,118 @@
+# Match engine
+# Every matcher is a MatchProfile: an ordered list of stages, each naming a
+# scorer from the registry, plus a threshold and a result builder. Scorers
+# run cheapest first and the engine stops as soon as a pair can no longer
+# reach the threshold, so a faster scorer or a tighter bound speeds up every
+# matcher built on it.
+
+from collections import namedtuple
+
+# score(lost, found, context, min_score, **options) -> score, or None once it
+# is known to stay below min_score. cost orders scorers, max_score bounds them.
+Scorer = namedtuple('Scorer', ['name', 'score', 'cost', 'max_score'])
+
+# applies(lost, found) returning False leaves the stage at 0 without scoring
+Stage = namedtuple('Stage', ['key', 'scorer', 'weight', 'applies', 'cost', 'max_score', 'options'])
+
+SCORERS = {}
+
+# Leaves room for float error between pruning and the final weighted sum
+_EPSILON = 1e-9
+
+def register_scorer(name, cost, max_score=100.0):
+    """Decorator adding a scorer function to the registry"""
+    def decorator(func):
+        SCORERS[name] = Scorer(name, func, cost, max_score)
+        return func
+    return decorator
+
+def stage(scorer, key=None, weight=1.0, applies=None, cost=None, max_score=None, **options):
+    """One profile stage; cost and max_score default to the scorer's own"""
+    return Stage(key or scorer, scorer, weight, applies, cost, max_score, options)
+
+class MatchProfile:
+    """One matcher: its stages, how they combine and what it returns
+
+    mode 'weighted' sums weight * score over the stages in the order given;
+    mode 'first' takes the first stage with a positive score, in the order
+    given, with the last stage as the fallback. filters are cheap
+    (lost, found, context) predicates checked before any scorer runs, and
+    finish(lost, found, context, scores, final) builds the result dict.
+    """
+
+    def __init__(self, name, stages, threshold, mode='weighted', strict=False, filters=(), finish=None):
+        self.name = name
+        self.stages = list(stages)
+        self.threshold = threshold
+        self.mode = mode
+        self.strict = strict
+        self.filters = tuple(filters)
+        self.finish = finish
+
+    def _run(self, stage_, lost, found, context, min_score):
+        return SCORERS[stage_.scorer].score(lost, found, context, min_score, **stage_.options)
+
+    def _max_score(self, stage_):
+        return SCORERS[stage_.scorer].max_score if stage_.max_score is None else stage_.max_score
+
+    def _cost(self, stage_):
+        return SCORERS[stage_.scorer].cost if stage_.cost is None else stage_.cost
+
+    def _first(self, lost, found, context, threshold, scores):
+        for position, stage_ in enumerate(self.stages):
+            if stage_.applies and not stage_.applies(lost, found):
+                scores[stage_.key] = 0.0
+                continue
+            fallback = position == len(self.stages) - 1
+            score = self._run(stage_, lost, found, context, threshold if fallback else 0)
+            if score is None:
+                return None
+            scores[stage_.key] = score
+            # A positive score decides the pair, later stages are skipped
+            if score > 0 or fallback:
+                return score
+        return None
+
+    def _weighted(self, lost, found, context, threshold, scores):
+        remaining = sum(stage_.weight * self._max_score(stage_) for stage_ in self.stages)
+        partial = 0.0
+        for stage_ in sorted(self.stages, key=self._cost):
+            remaining -= stage_.weight * self._max_score(stage_)
+            if stage_.applies and not stage_.applies(lost, found):
+                score = 0.0
+            else:
+                # Lowest score this stage needs for the pair to stay reachable
+                min_score = (threshold - partial - remaining) / stage_.weight
+                score = self._run(stage_, lost, found, context, min_score)
+                if score is None:
+                    return None
+            scores[stage_.key] = score
+            partial += stage_.weight * score
+            if partial + remaining + _EPSILON < threshold:
+                return None
+
+        final = 0.0
+        for stage_ in self.stages:
+            final += stage_.weight * scores[stage_.key]
+        return final
+
+    def evaluate(self, lost, found, context, threshold=None):
+        """Result dict for a pair, or None when it does not match"""
+        threshold = self.threshold if threshold is None else threshold
+        for check in self.filters:
+            if not check(lost, found, context):
+                return None
+
+        scores = {}
+        if self.mode == 'first':
+            final = self._first(lost, found, context, threshold, scores)
+        else:
+            final = self._weighted(lost, found, context, threshold, scores)
+
+        if final is None:
+            return None
+        if final <= threshold if self.strict else final < threshold:
+            return None
+        if self.finish:
+            return self.finish(lost, found, context, scores, final)
+        return {'similarity': final}
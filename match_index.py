@@ -0,0 +1,96 @@
+# Inverted index for lost/found candidate generation
+# Builds postings from item name, description keywords, location, location
+# group and category so the matchers only score pairs that have something in
+# common. Word fragments link words that share a stem or a syllable
+# ('notebook' / 'textbook'), which is enough character overlap for the text
+# scorers to reach their thresholds without a shared word.
+
+from collections import defaultdict
+from text_features import STOP_WORDS, clean_text
+
+# Length of the word fragments indexed
+FRAGMENT_LENGTH = 3
+
+def normalize_term(word):
+    """Fold simple plurals so 'wallet' and 'wallets' share a posting"""
+    if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+        return word[:-1]
+    return word
+
+def tokenize(text):
+    """Split text the same way the NLP scorers clean it"""
+    if not text:
+        return []
+    return clean_text(text).split()
+
+def word_fragments(word):
+    return {word[start:start + FRAGMENT_LENGTH] for start in range(len(word) - FRAGMENT_LENGTH + 1)}
+
+def index_terms(report, categorize=None, location_groups=None):
+    """Posting keys for a report row"""
+    terms = set()
+
+    # Item and description words, keeping short brand tokens like 'hp'
+    for word in tokenize(report['item_name']) + tokenize(report['description']):
+        if word not in STOP_WORDS:
+            terms.add('w:' + normalize_term(word))
+            terms.update('f:' + fragment for fragment in word_fragments(word))
+
+    for word in tokenize(report['location']):
+        if len(word) > 2 and word not in STOP_WORDS:
+            terms.add('l:' + normalize_term(word))
+
+    # 'food court' and 'cafeteria' score as close locations
+    if location_groups:
+        terms.update('g:' + group for group in location_groups(report['location']))
+
+    if categorize:
+        category = categorize(report['item_name'], report['description'])
+        if category and category != 'other':
+            terms.add('c:' + category)
+
+    # Image pairs are scored on the images, not the text
+    if report['image_filename']:
+        terms.add('img')
+
+    return terms
+
+class CandidateIndex:
+    """Term -> report postings over one side (usually the found reports)"""
+
+    def __init__(self, reports, categorize=None, location_groups=None):
+        self.reports = list(reports)
+        self.categorize = categorize
+        self.location_groups = location_groups
+        self.positions = {report['id']: position for position, report in enumerate(self.reports)}
+        self.postings = defaultdict(list)
+        for position, report in enumerate(self.reports):
+            for term in index_terms(report, categorize, location_groups):
+                self.postings[term].append(position)
+
+    def candidate_positions(self, report):
+        """Positions of indexed reports sharing at least one posting with `report`"""
+        positions = set()
+        for term in index_terms(report, self.categorize, self.location_groups):
+            positions.update(self.postings.get(term, ()))
+        return positions
+
+    def candidates(self, report, report_ids=()):
+        """Indexed reports sharing a posting with `report` or listed in `report_ids`, in index order"""
+        positions = self.candidate_positions(report)
+        positions.update(self.positions[report_id] for report_id in report_ids if report_id in self.positions)
+        return [self.reports[position] for position in sorted(positions)]
+
+def lcs_length(text1, text2):
+    """Longest common subsequence length (bit-parallel, one big-int op per character)"""
+    if not text1 or not text2:
+        return 0
+    char_masks = {}
+    for position, char in enumerate(text2):
+        char_masks[char] = char_masks.get(char, 0) | (1 << position)
+    full = (1 << len(text2)) - 1
+    row = full
+    for char in text1:
+        matched = row & char_masks.get(char, 0)
+        row = ((row + matched) | (row - matched)) & full
+    return len(text2) - bin(row).count('1')
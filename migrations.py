@@ -0,0 +1,86 @@
+# Versioned schema migrations
+# init_db() creates missing tables; changes to existing tables are numbered
+# steps recorded in schema_version, so each one runs once per database
+# instead of being retried at every start. Workers starting together take the
+# write lock before re-reading the version, so only one of them applies a
+# step. Append new steps, never edit or reorder applied ones.
+
+def column_exists(conn, table, column):
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})"))
+
+def add_column(table, column, definition):
+    """Step adding a column unless the table was created with it"""
+    def step(conn):
+        if not column_exists(conn, table, column):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+    return step
+
+# (version, description, steps), a step is an SQL string or a callable taking conn
+MIGRATIONS = [
+    (1, "reports.image_filename for databases from before image uploads", [
+        add_column('reports', 'image_filename', 'TEXT')
+    ]),
+    (2, "indexes for per-user and most-recent-first lookups", [
+        # my_reports, user_stats
+        "CREATE INDEX IF NOT EXISTS idx_reports_email_date ON reports (email, date_reported)",
+        # update_matches_for_report, active reports of one type
+        "CREATE INDEX IF NOT EXISTS idx_reports_type_status_date ON reports (type, status, date_reported)",
+        # admin_reports, live_feed
+        "CREATE INDEX IF NOT EXISTS idx_reports_date ON reports (date_reported)",
+        # my_notifications, unread_notifications_count
+        "CREATE INDEX IF NOT EXISTS idx_notifications_unread ON notifications (user_email, is_read, created_at)",
+        # notification_history
+        "CREATE INDEX IF NOT EXISTS idx_notifications_user_date ON notifications (user_email, created_at)",
+        # my_rewards, user_stats (covers SUM(tokens))
+        "CREATE INDEX IF NOT EXISTS idx_rewards_finder_date ON rewards (finder_email, created_at, tokens)",
+        # give_reward, check_reward_given
+        "CREATE INDEX IF NOT EXISTS idx_rewards_giver ON rewards (giver_email, finder_email, item_name)",
+        # live_feed
+        "CREATE INDEX IF NOT EXISTS idx_rewards_date ON rewards (created_at)"
+    ]),
+    (3, "index shapes ending in the sort column, so keyset pages on (sort column, id) need no sort", [
+        # Listing one type pages by date whatever the status
+        "DROP INDEX IF EXISTS idx_reports_type_status_date",
+        "CREATE INDEX IF NOT EXISTS idx_reports_type_date ON reports (type, date_reported)",
+        # tokens after created_at broke the (created_at, id) order
+        "DROP INDEX IF EXISTS idx_rewards_finder_date",
+        "CREATE INDEX IF NOT EXISTS idx_rewards_finder_date ON rewards (finder_email, created_at)"
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def schema_version(conn):
+    row = conn.execute("SELECT version FROM schema_version WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+def migrate(conn):
+    """Apply pending migrations and return the schema version"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        )
+    """)
+    if schema_version(conn) >= LATEST_VERSION:
+        return schema_version(conn)
+
+    conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        current = schema_version(conn)
+        for version, description, steps in MIGRATIONS:
+            if version <= current:
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            current = version
+        conn.execute("INSERT OR REPLACE INTO schema_version (id, version) VALUES (1, ?)", (current,))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return current
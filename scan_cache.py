@@ -0,0 +1,43 @@
+# Persistent cache of image scan results
+# A scan is keyed by the content hashes of both images and the scanner
+# version, so re-scanning a pair is one primary-key lookup, every worker
+# process shares the entries, and bumping the version makes old entries
+# unreachable. The table is bounded, least recently used entries go first.
+
+import json
+import time
+
+# last_used is refreshed at most this often (seconds), so most hits do not write
+TOUCH_INTERVAL = 60
+
+def load_scan(conn, lost_hash, found_hash, version):
+    """Cached scan result for a pair of content hashes, or None"""
+    row = conn.execute("""
+        SELECT result, last_used FROM scan_cache
+        WHERE lost_hash = ? AND found_hash = ? AND scanner_version = ?
+    """, (lost_hash, found_hash, version)).fetchone()
+    if not row:
+        return None
+    now = time.time()
+    if now - row[1] > TOUCH_INTERVAL:
+        conn.execute("""
+            UPDATE scan_cache SET last_used = ?
+            WHERE lost_hash = ? AND found_hash = ? AND scanner_version = ?
+        """, (now, lost_hash, found_hash, version))
+    return json.loads(row[0])
+
+def store_scan(conn, lost_hash, found_hash, version, result, max_entries):
+    """Cache a scan result, evicting the least recently used entries beyond max_entries"""
+    conn.execute("""
+        INSERT OR REPLACE INTO scan_cache (lost_hash, found_hash, scanner_version, result, last_used)
+        VALUES (?, ?, ?, ?, ?)
+    """, (lost_hash, found_hash, version, json.dumps(result), time.time()))
+    conn.execute("""
+        DELETE FROM scan_cache WHERE rowid IN (
+            SELECT rowid FROM scan_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+        )
+    """, (max_entries,))
+
+def purge_scans(conn, version):
+    """Drop entries from other scanner versions"""
+    conn.execute("DELETE FROM scan_cache WHERE scanner_version != ?", (version,))
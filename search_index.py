@@ -0,0 +1,92 @@
+# Full-text search over reports
+# An FTS5 table indexes the item name, description and location of every
+# report and triggers keep it in step with the reports table (external
+# content, so the text itself is stored once). A search is an index lookup
+# ranked by bm25 instead of a LIKE scan or scoring every report in Python.
+# Every query word also matches as a prefix, so "wal" already finds "wallet"
+# while the user is typing.
+
+import re
+import sqlite3
+
+# bm25 weights of item_name, description and location
+COLUMN_WEIGHTS = (10.0, 4.0, 2.0)
+
+_fts5 = None
+
+def fts5_available():
+    """Whether this SQLite build has FTS5, checked once"""
+    global _fts5
+    if _fts5 is None:
+        try:
+            sqlite3.connect(':memory:').execute("CREATE VIRTUAL TABLE probe USING fts5(text)")
+            _fts5 = True
+        except sqlite3.OperationalError:
+            _fts5 = False
+    return _fts5
+
+def create_search_index(conn):
+    """Create the search table and its triggers, indexing existing reports once"""
+    if not fts5_available():
+        return False
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'reports_fts'"
+    ).fetchone()
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+            item_name, description, location,
+            content = 'reports', content_rowid = 'id',
+            tokenize = 'unicode61', prefix = '2 3'
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS reports_fts_insert AFTER INSERT ON reports
+        BEGIN
+            INSERT INTO reports_fts (rowid, item_name, description, location)
+            VALUES (new.id, new.item_name, new.description, new.location);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS reports_fts_delete AFTER DELETE ON reports
+        BEGIN
+            INSERT INTO reports_fts (reports_fts, rowid, item_name, description, location)
+            VALUES ('delete', old.id, old.item_name, old.description, old.location);
+        END
+    """)
+    # Status changes do not touch the index
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS reports_fts_update AFTER UPDATE OF item_name, description, location ON reports
+        BEGIN
+            INSERT INTO reports_fts (reports_fts, rowid, item_name, description, location)
+            VALUES ('delete', old.id, old.item_name, old.description, old.location);
+            INSERT INTO reports_fts (rowid, item_name, description, location)
+            VALUES (new.id, new.item_name, new.description, new.location);
+        END
+    """)
+    if not exists:
+        conn.execute("INSERT INTO reports_fts (reports_fts, rank) VALUES ('rank', ?)",
+                     (f"bm25({', '.join(str(weight) for weight in COLUMN_WEIGHTS)})",))
+        conn.execute("INSERT INTO reports_fts (reports_fts) VALUES ('rebuild')")
+    return True
+
+def match_expression(words, any_word=False):
+    """FTS5 query matching every word (or any of them) as a prefix, None without words"""
+    terms = ['"{}"*'.format(word.replace('"', '""')) for word in words]
+    return (' OR ' if any_word else ' AND ').join(terms) or None
+
+def search_words(text):
+    return re.findall(r'\w+', text.lower())
+
+def search_reports(conn, words, limit, any_word=False, active_only=False):
+    """Report rows matching `words`, best bm25 rank first"""
+    expression = match_expression(words, any_word)
+    if expression is None:
+        return []
+    status = "AND r.status = 'active'" if active_only else ''
+    return conn.execute(f"""
+        SELECT r.* FROM reports_fts
+        JOIN reports r ON r.id = reports_fts.rowid
+        WHERE reports_fts MATCH ? {status}
+        ORDER BY reports_fts.rank, r.date_reported DESC
+        LIMIT ?
+    """, (expression, limit)).fetchall()
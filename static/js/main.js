@@ -44,8 +44,69 @@ document.addEventListener('DOMContentLoaded', function() {
             this.value = this.value.replace(/[^0-9+\-\s]/g, '');
         });
     });
+    
+    // Paged lists load their next page when the end scrolls into view
+    document.querySelectorAll('[data-next-page]').forEach(loader => {
+        whenVisible(loader, () => loadNextPage(loader));
+    });
 });
 
+// Keyset pagination
+// Calls load() whenever `sentinel` comes into view. load() returns a promise
+// of whether more pages remain; the sentinel is removed after the last one.
+function whenVisible(sentinel, load) {
+    let loading = false;
+    const observer = new IntersectionObserver(entries => {
+        if (loading || !entries.some(entry => entry.isIntersecting)) return;
+        loading = true;
+        load().then(more => {
+            loading = false;
+            if (more) {
+                // Observing again reports the current visibility, so a short page keeps loading
+                observer.unobserve(sentinel);
+                observer.observe(sentinel);
+            } else {
+                observer.disconnect();
+                sentinel.remove();
+            }
+        });
+    }, { rootMargin: '200px' });
+    observer.observe(sentinel);
+}
+
+// Appends the [data-page-items] children of the next server-rendered page
+function loadNextPage(loader) {
+    return fetch(loader.dataset.nextPage)
+        .then(response => response.text())
+        .then(html => {
+            const page = new DOMParser().parseFromString(html, 'text/html');
+            const items = page.querySelector('[data-page-items]');
+            const list = document.querySelector('[data-page-items]');
+            if (items && list) {
+                list.append(...items.children);
+            }
+            const next = page.querySelector('[data-next-page]');
+            if (next) {
+                loader.dataset.nextPage = next.dataset.nextPage;
+            }
+            return Boolean(next);
+        })
+        .catch(error => {
+            console.error('Error loading more items:', error);
+            showAlert('Error loading more items', 'danger');
+            return false;
+        });
+}
+
+// One page of a paged JSON list, with the cursor of the next page (null on the last)
+function fetchPage(url, cursor) {
+    const pageUrl = cursor ? url + (url.includes('?') ? '&' : '?') + 'cursor=' + encodeURIComponent(cursor) : url;
+    return fetch(pageUrl).then(response => response.json().then(items => ({
+        items: items,
+        nextCursor: response.headers.get('X-Next-Cursor')
+    })));
+}
+
 function showAlert(message, type) {
     const alertDiv = document.createElement('div');
     alertDiv.className = `alert alert-${type}`;
@@ -194,10 +255,10 @@ function markNotificationAsRead(notificationId) {
 
 // Admin Dashboard Functions
 function loadAllReports() {
-    fetch('/admin_reports')
-        .then(response => response.json())
-        .then(data => {
-            displayReports(data);
+    // Oldest first (first come first serve), later pages load on scroll
+    fetchPage('/admin_reports?order=asc')
+        .then(page => {
+            displayReports(page.items, page.nextCursor);
         })
         .catch(error => {
             console.error('Error loading reports:', error);
@@ -205,7 +266,7 @@ function loadAllReports() {
         });
 }
 
-function displayReports(reports) {
+function displayReports(reports, nextCursor) {
     const container = document.getElementById('reports-container');
     if (!container) return;
     
@@ -214,9 +275,6 @@ function displayReports(reports) {
         return;
     }
     
-    // Sort reports by date (first come first serve)
-    reports.sort((a, b) => new Date(a.date_reported) - new Date(b.date_reported));
-    
     let html = `
         <div style="margin-bottom: 15px; padding: 10px; background: #e3f2fd; border-radius: 8px;">
             <strong>📅 Reports sorted by submission time (First Come First Serve)</strong>
@@ -235,34 +293,54 @@ function displayReports(reports) {
                     <th>Status</th>
                 </tr>
             </thead>
-            <tbody>
+            <tbody id="reports-rows">
     `;
     
-    reports.forEach(report => {
-        const imageHtml = report.image_filename ? 
-            `<img src="/static/uploads/${report.image_filename}" alt="Item image" style="width: 60px; height: 60px; object-fit: cover; border-radius: 8px; cursor: pointer;" onclick="showImageModal('/static/uploads/${report.image_filename}')" />` : 
-            '<span style="color: #64748b; font-size: 12px;">No image</span>';
-        
-        const reportDate = new Date(report.date_reported);
-        const dateTimeString = reportDate.toLocaleDateString() + ' ' + reportDate.toLocaleTimeString();
-        
-        html += `
-            <tr>
-                <td>${report.id}</td>
-                <td>${imageHtml}</td>
-                <td>${report.name}</td>
-                <td>${report.email}</td>
-                <td>${report.phone}</td>
-                <td>${report.item_name}</td>
-                <td><span class="badge ${report.type === 'lost' ? 'badge-danger' : 'badge-success'}">${report.type}</span></td>
-                <td style="font-size: 12px; white-space: nowrap;">${dateTimeString}</td>
-                <td>${report.status}</td>
-            </tr>
-        `;
-    });
-    
+    html += reports.map(reportRow).join('');
     html += '</tbody></table>';
+    if (nextCursor) {
+        html += '<p class="loading" id="reports-more">Loading more reports...</p>';
+    }
     container.innerHTML = html;
+    
+    const more = document.getElementById('reports-more');
+    if (more) {
+        let cursor = nextCursor;
+        whenVisible(more, () => fetchPage('/admin_reports?order=asc', cursor)
+            .then(page => {
+                document.getElementById('reports-rows').insertAdjacentHTML('beforeend', page.items.map(reportRow).join(''));
+                cursor = page.nextCursor;
+                return Boolean(cursor);
+            })
+            .catch(error => {
+                console.error('Error loading reports:', error);
+                showAlert('Error loading reports', 'danger');
+                return false;
+            }));
+    }
+}
+
+function reportRow(report) {
+    const imageHtml = report.image_filename ? 
+        `<img src="/static/uploads/${report.image_filename}" alt="Item image" style="width: 60px; height: 60px; object-fit: cover; border-radius: 8px; cursor: pointer;" onclick="showImageModal('/static/uploads/${report.image_filename}')" />` : 
+        '<span style="color: #64748b; font-size: 12px;">No image</span>';
+    
+    const reportDate = new Date(report.date_reported);
+    const dateTimeString = reportDate.toLocaleDateString() + ' ' + reportDate.toLocaleTimeString();
+    
+    return `
+        <tr>
+            <td>${report.id}</td>
+            <td>${imageHtml}</td>
+            <td>${report.name}</td>
+            <td>${report.email}</td>
+            <td>${report.phone}</td>
+            <td>${report.item_name}</td>
+            <td><span class="badge ${report.type === 'lost' ? 'badge-danger' : 'badge-success'}">${report.type}</span></td>
+            <td style="font-size: 12px; white-space: nowrap;">${dateTimeString}</td>
+            <td>${report.status}</td>
+        </tr>
+    `;
 }
 
 function findMatches() {
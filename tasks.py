@@ -17,7 +17,7 @@ celery = Celery('lostfound')
 def find_matches_task(report_id, threshold=0.5):
     """Background task for finding matches"""
     from models import Report, Match, db
-    from app import simple_image_similarity, calculate_similarity
+    from app import MATCH_PROFILES
     
     report = Report.query.get(report_id)
     if not report:
@@ -30,13 +30,17 @@ def find_matches_task(report_id, threshold=0.5):
         Report.status == 'active'
     ).all()
     
+    profile = MATCH_PROFILES['text']
+    report_text = {'combined': f"{report.item_name} {report.description}"}
+    
     matches = []
     for candidate in candidates:
-        # Calculate similarity
-        text_sim = calculate_similarity(
-            f"{report.item_name} {report.description}",
-            f"{candidate.item_name} {candidate.description}"
-        )
+        # Calculate similarity, skipping the full ratio when threshold is out of reach
+        result = profile.evaluate(report, candidate, {
+            'lost_text': report_text,
+            'found_text': {'combined': f"{candidate.item_name} {candidate.description}"}
+        }, threshold=threshold * 100)
+        text_sim = result['similarity'] / 100 if result else 0.0
         
         if text_sim >= threshold:
             # Check if match already exists
@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """app.py imported in a scratch directory, where it creates its database and folders"""
+    os.chdir(tmp_path_factory.mktemp('app'))
+    import app
+    return app
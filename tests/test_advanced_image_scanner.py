@@ -0,0 +1,145 @@
+import importlib
+import os
+import sys
+import types
+
+import numpy as np
+import pytest
+from PIL import Image
+
+def fake_cv2():
+    """The few cv2 calls advanced_image_scanner makes, on numpy and PIL"""
+    cv2 = types.ModuleType('cv2')
+    cv2.COLOR_BGR2GRAY = 6
+    cv2.NORM_HAMMING = 6
+    cv2.HISTCMP_CORREL = 0
+
+    def imread(path):
+        try:
+            with Image.open(path) as image:
+                return np.asarray(image.convert('RGB'))[:, :, ::-1].copy()
+        except OSError:
+            return None
+
+    def resize(image, size):
+        return np.asarray(Image.fromarray(image[:, :, ::-1]).resize(size))[:, :, ::-1].copy()
+
+    def calc_hist(images, channels, mask, bins, ranges):
+        pixels = images[0].reshape(-1, 3).astype(np.float64)
+        histogram, _ = np.histogramdd(pixels, bins=bins, range=[(0, 256)] * 3)
+        return histogram.astype(np.float32)
+
+    def compare_hist(histogram1, histogram2, method):
+        return float(np.corrcoef(histogram1.ravel(), histogram2.ravel())[0, 1])
+
+    class ORB:
+        def detectAndCompute(self, gray, mask):
+            # One keypoint per textured 10x10 block, its pixels as the descriptor
+            blocks = gray.reshape(30, 10, 30, 10).swapaxes(1, 2).reshape(900, 100)
+            textured = blocks[blocks.std(axis=1) > 0]
+            if not len(textured):
+                return [], None
+            return [object()] * len(textured), textured[:, :32].astype(np.uint8)
+
+    class BFMatcher:
+        def __init__(self, norm, crossCheck=False):
+            pass
+
+        def match(self, descriptors1, descriptors2):
+            known = {row.tobytes() for row in descriptors2}
+            return [row for row in descriptors1 if row.tobytes() in known]
+
+    cv2.imread = imread
+    cv2.resize = resize
+    cv2.cvtColor = lambda image, code: image.mean(axis=2).astype(np.uint8)
+    cv2.calcHist = calc_hist
+    cv2.compareHist = compare_hist
+    cv2.ORB_create = ORB
+    cv2.BFMatcher = BFMatcher
+    return cv2
+
+@pytest.fixture
+def scanner(monkeypatch, tmp_path):
+    """advanced_image_scanner imported against the cv2 and skimage stand-ins, caching under tmp_path"""
+    skimage = types.ModuleType('skimage')
+    metrics = types.ModuleType('skimage.metrics')
+    metrics.structural_similarity = lambda gray1, gray2: float(
+        1 - np.abs(gray1.astype(np.float64) - gray2.astype(np.float64)).mean() / 255)
+    skimage.metrics = metrics
+    monkeypatch.setitem(sys.modules, 'cv2', fake_cv2())
+    monkeypatch.setitem(sys.modules, 'skimage', skimage)
+    monkeypatch.setitem(sys.modules, 'skimage.metrics', metrics)
+    monkeypatch.delitem(sys.modules, 'advanced_image_scanner', raising=False)
+    module = importlib.import_module('advanced_image_scanner')
+    monkeypatch.setattr(module, 'CACHE_FOLDER', str(tmp_path / 'scanner_cache'))
+    yield module
+    sys.modules.pop('advanced_image_scanner', None)
+
+@pytest.fixture
+def computed(scanner, monkeypatch):
+    """Paths compute_scan_features was called with"""
+    calls = []
+    compute = scanner.compute_scan_features
+    def counting(img_path):
+        calls.append(img_path)
+        return compute(img_path)
+    monkeypatch.setattr(scanner, 'compute_scan_features', counting)
+    return calls
+
+def save_image(path, seed, flat=False):
+    rng = np.random.default_rng(seed)
+    if flat:
+        pixels = np.full((240, 320, 3), rng.integers(0, 256, 3), dtype=np.uint8)
+    else:
+        pixels = rng.integers(0, 256, (240, 320, 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(path)
+    return str(path)
+
+def assert_same_features(features1, features2):
+    assert np.array_equal(features1.gray, features2.gray)
+    assert np.array_equal(features1.histogram, features2.histogram)
+    assert features1.keypoints == features2.keypoints
+    assert np.array_equal(features1.mean_color, features2.mean_color)
+    if features1.descriptors is None:
+        assert features2.descriptors is None
+    else:
+        assert np.array_equal(features1.descriptors, features2.descriptors)
+
+@pytest.mark.parametrize('flat', [False, True], ids=['descriptors', 'no-descriptors'])
+def test_second_call_reads_cache(scanner, computed, tmp_path, flat):
+    path = save_image(tmp_path / 'lost.png', 1, flat=flat)
+    first = scanner.scan_features(path)
+    assert (first.descriptors is None) == flat
+    assert os.path.exists(scanner.cache_path(path))
+
+    second = scanner.scan_features(path)
+    assert computed == [path]
+    assert_same_features(first, second)
+
+def test_newer_image_is_recomputed(scanner, computed, tmp_path):
+    path = save_image(tmp_path / 'lost.png', 1)
+    scanner.scan_features(path)
+    cached = os.path.getmtime(scanner.cache_path(path))
+    os.utime(path, (cached + 10, cached + 10))
+
+    scanner.scan_features(path)
+    assert computed == [path, path]
+
+def test_changed_version_is_recomputed(scanner, computed, tmp_path, monkeypatch):
+    path = save_image(tmp_path / 'lost.png', 1)
+    scanner.scan_features(path)
+    monkeypatch.setattr(scanner, 'FEATURES_VERSION', scanner.FEATURES_VERSION + 1)
+
+    scanner.scan_features(path)
+    scanner.scan_features(path)
+    assert computed == [path, path]
+
+def test_scan_many_matches_pairwise_scans_in_order(scanner, tmp_path):
+    lost = save_image(tmp_path / 'lost.png', 1)
+    found = [save_image(tmp_path / f'found{i}.png', i, flat=i % 3 == 0) for i in range(8)]
+    found.insert(4, str(tmp_path / 'missing.png'))
+
+    results = scanner.advanced_image_scan_many(lost, found, workers=3)
+    assert results == [scanner.advanced_image_scan(lost, path) for path in found]
+    assert results[4] == {"error": "Could not load images"}
+    assert results[1]['ai_percentage'] == 100.0
@@ -0,0 +1,60 @@
+import random
+
+from PIL import Image, ImageDraw
+
+from color_index import MAX_CHANNEL_DIFF, near_color_pairs
+
+def test_cutoff_matches_colour_scorer(app_module):
+    assert app_module.mean_color_similarity((0, 0, 0), (MAX_CHANNEL_DIFF, 50, 0)) > 0
+    assert app_module.mean_color_similarity((0, 0, 0), (MAX_CHANNEL_DIFF + 1, 0, 0)) == 0
+
+def test_near_color_pairs_keeps_every_colour_within_cutoff():
+    rng = random.Random(3)
+    lost = {i: [(*(rng.randrange(256) for _ in range(3)), 1.0)] for i in range(150)}
+    found = {i: [(*(rng.randrange(256) for _ in range(3)), 1.0)] for i in range(150)}
+    for levels in (2, 3, 4, 8, 16, 32):
+        pairs = near_color_pairs(lost, found, levels)
+        for lost_id, (lost_color,) in lost.items():
+            for found_id, (found_color,) in found.items():
+                if all(abs(a - b) <= MAX_CHANNEL_DIFF for a, b in zip(lost_color[:3], found_color[:3])):
+                    assert (lost_id, found_id) in pairs
+
+def test_color_filter_drops_only_pairs_without_colour_similarity(app_module, monkeypatch):
+    """At 4 levels the colour buckets drop pairs the hash alone keeps, none with a colour score or above 60%"""
+    rng = random.Random(7)
+    conn = app_module.get_db_connection()
+    reports = {'lost': [], 'found': []}
+    for i in range(30):
+        for report_type in ('lost', 'found'):
+            base = tuple(rng.randrange(256) for _ in range(3))
+            image = Image.new('RGB', (200, 150), base)
+            draw = ImageDraw.Draw(image)
+            for _ in range(rng.randrange(1, 4)):
+                x, y = rng.randrange(150), rng.randrange(100)
+                draw.rectangle([x, y, x + rng.randrange(20, 80), y + rng.randrange(20, 80)],
+                               fill=tuple(min(255, max(0, channel + rng.randrange(-60, 60))) for channel in base))
+            filename = f'colors_{report_type}_{i}.png'
+            image.save(f'static/uploads/{filename}')
+            report_id = conn.execute("""
+                INSERT INTO reports (name, email, phone, item_name, description, location, image_filename, date_reported, type)
+                VALUES ('T', ?, '9876543210', 'bag', 'bag', 'library', ?, '2026-01-01 00:00:00', ?)
+            """, (f'{report_type}{i}@klu.ac.in', filename, report_type)).lastrowid
+            reports[report_type].append(conn.execute("SELECT * FROM reports WHERE id = ?", (report_id,)).fetchone())
+    conn.commit()
+
+    lost, found = reports['lost'], reports['found']
+    monkeypatch.setitem(app_module.app.config, 'IMAGE_COLOR_LEVELS', 0)
+    hash_pairs = app_module.image_neighbour_pairs(conn, lost, found)
+    monkeypatch.setitem(app_module.app.config, 'IMAGE_COLOR_LEVELS', 4)
+    color_pairs = app_module.image_neighbour_pairs(conn, lost, found)
+
+    images = app_module.get_match_images(conn, lost + found)
+    scans = app_module.batch_image_percentages(images, hash_pairs)
+    records = app_module.get_image_records(conn, lost + found)
+    conn.close()
+    close = {pair for pair, percentage in scans.items() if percentage > 60}
+    assert close and color_pairs < hash_pairs
+    assert close <= color_pairs
+    for lost_id, found_id in hash_pairs - color_pairs:
+        assert app_module.mean_color_similarity(records[lost_id].mean_rgb, records[found_id].mean_rgb) == 0
+        assert scans[(lost_id, found_id)] <= 60
@@ -0,0 +1,47 @@
+import io
+
+import pytest
+from PIL import Image
+
+@pytest.fixture
+def client(app_module):
+    """Test client signed in with Google"""
+    client = app_module.app.test_client()
+    with client.session_transaction() as session:
+        session['google_authenticated'] = True
+        session['user_email'] = 'owner@klu.ac.in'
+    return client
+
+def photo():
+    data = io.BytesIO()
+    Image.new('RGB', (64, 48), (120, 60, 200)).save(data, 'PNG')
+    data.seek(0)
+    return data
+
+def report_lost(client, item_name):
+    return client.post('/report_lost', data={
+        'name': 'Owner', 'email': 'owner@klu.ac.in', 'phone': '9876543210',
+        'item_name': item_name, 'description': 'purple pouch with a zip', 'location': 'library',
+        'image': (photo(), 'pouch.png')
+    }, content_type='multipart/form-data', follow_redirects=False)
+
+def flashes(client):
+    with client.session_transaction() as session:
+        return session.pop('_flashes', [])
+
+def test_reused_photo_names_the_earlier_report(app_module, client, monkeypatch):
+    # Image jobs run inline, so none is left running on the reports deleted below
+    monkeypatch.setattr(app_module.image_pool, 'workers', 0)
+    report_lost(client, 'pouch')
+    assert not [message for category, message in flashes(client) if category == 'warning']
+
+    report_lost(client, 'pouch again')
+    conn = app_module.get_db_connection()
+    first = conn.execute("SELECT id FROM reports WHERE item_name = 'pouch'").fetchone()['id']
+    warnings = [message for category, message in flashes(client) if category == 'warning']
+    assert warnings == [f"This photo was already uploaded with report #{first}"]
+    conn.execute("DELETE FROM matches WHERE lost_report_id IN (SELECT id FROM reports WHERE item_name LIKE 'pouch%')")
+    conn.execute("DELETE FROM image_jobs WHERE report_id IN (SELECT id FROM reports WHERE item_name LIKE 'pouch%')")
+    conn.execute("DELETE FROM reports WHERE item_name LIKE 'pouch%'")
+    conn.commit()
+    conn.close()
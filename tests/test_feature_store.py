@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from feature_store import FeatureStore
+from image_features import compute_image_record
+
+@pytest.fixture
+def records(tmp_path):
+    """ImageRecords of two flat images of different colours"""
+    records = []
+    for index, color in enumerate([(200, 30, 30), (30, 30, 200)]):
+        path = str(tmp_path / f'image{index}.png')
+        Image.new('RGB', (64, 48), color).save(path)
+        records.append(compute_image_record(path))
+    return records
+
+def test_clear_empties_store_for_every_mapping(tmp_path, records):
+    path = str(tmp_path / 'store' / 'lost.features')
+    writer, reader = FeatureStore(path), FeatureStore(path)
+    assert [writer.append(record) for record in records] == [0, 1]
+    assert len(reader.view()) == 2
+
+    writer.clear()
+    assert len(writer.view()) == len(reader.view()) == 0
+    # Rows start again from 0 and readers of the old file see the new one
+    assert writer.append(records[1]) == 0
+    _, means, _, _ = reader.arrays([0])
+    assert np.allclose(means[0], records[1].mean_rgb)
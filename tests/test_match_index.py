@@ -0,0 +1,108 @@
+import random
+
+import pytest
+
+# Item, description words and location per family, distinct enough that
+# reports of different families share no posting
+FAMILIES = [
+    ('umbrella', ['folding', 'umbrella', 'wooden', 'handle', 'black', 'canopy'], 'bus stop'),
+    ('laptop', ['lenovo', 'laptop', 'grey', 'sleeve', 'charger', 'sticker'], 'lab 3'),
+    ('passport', ['passport', 'visa', 'pages', 'blue', 'cover', 'photo'], 'admin office'),
+    ('bottle', ['steel', 'bottle', 'flask', 'bent', 'cap', 'green'], 'gym'),
+    ('earbuds', ['earbuds', 'boat', 'white', 'case', 'pods', 'scuffed'], 'canteen'),
+]
+
+@pytest.fixture
+def reports(app_module):
+    """Found reports of every family and one lost umbrella filed after them"""
+    rng = random.Random(11)
+    conn = app_module.get_db_connection()
+    ids = []
+    for index in range(40):
+        item, words, location = FAMILIES[index % len(FAMILIES)]
+        ids.append(conn.execute("""
+            INSERT INTO reports (name, email, phone, item_name, description, location, image_filename, date_reported, type)
+            VALUES ('T', ?, '9876543210', ?, ?, ?, NULL, '2026-02-01 00:00:00', 'found')
+        """, (f'finder{index}@klu.ac.in', item, ' '.join(rng.sample(words, 4)), location)).lastrowid)
+    lost_id = conn.execute("""
+        INSERT INTO reports (name, email, phone, item_name, description, location, image_filename, date_reported, type)
+        VALUES ('T', 'owner@klu.ac.in', '9876543210', 'umbrella', 'black folding umbrella with a wooden handle',
+                'bus stop', NULL, '2026-02-02 00:00:00', 'lost')
+    """).lastrowid
+    conn.commit()
+    yield conn, lost_id, ids
+    placeholders = ','.join('?' * (len(ids) + 1))
+    conn.execute(f"DELETE FROM matches WHERE lost_report_id IN ({placeholders}) OR found_report_id IN ({placeholders})",
+                 (ids + [lost_id]) * 2)
+    conn.execute(f"DELETE FROM reports WHERE id IN ({placeholders})", ids + [lost_id])
+    conn.commit()
+    conn.close()
+
+@pytest.fixture
+def scored_pairs(app_module, monkeypatch):
+    """(lost_id, found_id) of every score_pair call"""
+    calls = []
+    score_pair = app_module.score_pair
+    def counting(lost, found, *args, **kwargs):
+        calls.append((lost['id'], found['id']))
+        return score_pair(lost, found, *args, **kwargs)
+    monkeypatch.setattr(app_module, 'score_pair', counting)
+    return calls
+
+def stored_matches(conn, lost_id):
+    return {(row['found_report_id'], row['match_kind']): row['similarity_score'] for row in conn.execute(
+        "SELECT found_report_id, match_kind, similarity_score FROM matches WHERE lost_report_id = ?", (lost_id,)
+    )}
+
+def every_pair_matches(app_module, conn, lost_id):
+    """Matches of the lost report from scoring it against every active found report"""
+    lost = conn.execute("SELECT * FROM reports WHERE id = ?", (lost_id,)).fetchone()
+    found_items = conn.execute("SELECT * FROM reports WHERE type = 'found' AND status = 'active' AND id < ?",
+                               (lost_id,)).fetchall()
+    texts = app_module.get_report_texts(conn, [lost] + list(found_items))
+    matches = {}
+    for found in found_items:
+        results = app_module.score_pair(lost, found, texts[lost_id], texts[found['id']], scan_images=False)
+        for kind, result in results.items():
+            if result is not None:
+                matches[(found['id'], kind)] = result['similarity']
+    return matches, len(found_items)
+
+def test_new_report_scores_only_candidates(app_module, reports, scored_pairs):
+    conn, lost_id, found_ids = reports
+    expected, found_count = every_pair_matches(app_module, conn, lost_id)
+    del scored_pairs[:]
+
+    app_module.update_matches_for_report(conn, lost_id)
+    conn.commit()
+    assert expected
+    assert stored_matches(conn, lost_id) == expected
+    assert {found_id for found_id, _ in expected} <= {found_id for _, found_id in scored_pairs}
+    # Only the umbrellas share a posting with the lost umbrella
+    assert len(scored_pairs) == len(found_ids) // len(FAMILIES) < found_count
+
+def test_rebuild_scores_only_candidates(app_module, reports, scored_pairs):
+    conn, lost_id, found_ids = reports
+    expected, _ = every_pair_matches(app_module, conn, lost_id)
+    lost_count = conn.execute("SELECT COUNT(*) FROM reports WHERE type = 'lost' AND status = 'active'").fetchone()[0]
+    found_count = conn.execute("SELECT COUNT(*) FROM reports WHERE type = 'found' AND status = 'active'").fetchone()[0]
+    del scored_pairs[:]
+
+    app_module.rebuild_matches(conn, workers=1)
+    assert stored_matches(conn, lost_id) == expected
+    assert len([pair for pair in scored_pairs if pair[0] == lost_id]) == len(found_ids) // len(FAMILIES)
+    assert len(scored_pairs) < lost_count * found_count
+
+def rebuilt_matches(app_module, conn, workers):
+    app_module.rebuild_matches(conn, workers=workers)
+    return [tuple(row) for row in conn.execute("""
+        SELECT lost_report_id, found_report_id, match_kind, similarity_score, details
+        FROM matches ORDER BY lost_report_id, found_report_id, match_kind
+    """)]
+
+def test_parallel_rebuild_matches_serial(app_module, reports):
+    conn, lost_id, _ = reports
+    serial = rebuilt_matches(app_module, conn, 1)
+    # Spawned workers load the reports, texts and images themselves
+    assert rebuilt_matches(app_module, conn, 2) == serial
+    assert stored_matches(conn, lost_id)
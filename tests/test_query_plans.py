@@ -0,0 +1,35 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from migrations import LATEST_VERSION, migrate, schema_version
+from query_plans import QUERIES, plan_problems, query_plans
+
+@pytest.fixture
+def migrated(app_module, tmp_path):
+    """A new database with the app's tables as init_db creates them, migrated from version 0"""
+    source = app_module.get_db_connection()
+    tables = [row['sql'] for row in source.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name IN ('reports', 'notifications', 'rewards')"
+    )]
+    source.close()
+
+    conn = sqlite3.connect(str(tmp_path / 'plans.db'))
+    for sql in tables:
+        conn.execute(sql)
+    assert migrate(conn) == LATEST_VERSION
+    yield conn
+    conn.close()
+
+def test_migrations_apply_once(migrated):
+    assert schema_version(migrated) == LATEST_VERSION
+    assert migrate(migrated) == LATEST_VERSION
+
+@pytest.mark.parametrize('index', range(len(QUERIES)), ids=[route for route, _, _ in QUERIES])
+def test_route_query_uses_an_index(migrated, index):
+    route, plan = query_plans(migrated)[index]
+    assert plan_problems(plan) == [], f"{route}: {plan}"
@@ -0,0 +1,132 @@
+# Precomputed text features for the NLP scorers
+# Each report's cleaned text, token set and keyword set are computed once when
+# the report is written and stored with tokens interned to integer ids, so the
+# matching loops compare ids instead of re-tokenizing strings.
+
+import re
+from array import array
+from collections import namedtuple
+
+from db_pool import select_in
+
+STOP_WORDS = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'is', 'was', 'are', 'were', 'have', 'has', 'had', 'will', 'would', 'could', 'should', 'may', 'might', 'can', 'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'my', 'your', 'his', 'her', 'its', 'our', 'their'}
+
+# clean: text as calculate_nlp_text_similarity cleans it
+# token_ids: interned words of `clean` (the Jaccard sets)
+# keyword_ids: interned extract_keywords() output
+# tags: extra labels the caller computed from the raw text
+TextFeatures = namedtuple('TextFeatures', ['clean', 'token_ids', 'keyword_ids', 'tags'])
+
+# Ids are never reassigned, so every worker can cache them for its lifetime
+_token_ids = {}
+
+def clean_text(text):
+    """Lowercase and strip everything except letters, digits and whitespace"""
+    return re.sub(r'[^a-zA-Z0-9\s]', '', text.lower())
+
+def keyword_tokens(text):
+    """Same filter as extract_keywords"""
+    words = re.findall(r'\b\w+\b', text.lower())
+    return {word for word in words if len(word) > 2 and word not in STOP_WORDS}
+
+def intern_tokens(conn, tokens, create=True):
+    """Map tokens to their ids, adding unseen tokens when `create` is set
+
+    Tokens that are not in the table and not created get distinct negative
+    ids, so they count towards set sizes but never intersect stored ids.
+    """
+    missing = [token for token in set(tokens) if token not in _token_ids]
+    fetched = {}
+    if missing:
+        if create:
+            conn.executemany("INSERT OR IGNORE INTO tokens (token) VALUES (?)", [(token,) for token in missing])
+        for token_id, token in select_in(conn, "SELECT id, token FROM tokens WHERE token IN ({placeholders})", missing):
+            fetched[token] = token_id
+        # Freshly inserted ids are not cached until a later read sees them
+        # committed, a rolled back insert could otherwise hand them out twice
+        if not create:
+            _token_ids.update(fetched)
+
+    ids = {}
+    unknown = 0
+    for token in set(tokens):
+        if token in _token_ids:
+            ids[token] = _token_ids[token]
+        elif token in fetched:
+            ids[token] = fetched[token]
+        else:
+            unknown -= 1
+            ids[token] = unknown
+    return ids
+
+def build_text_features(conn, text, tags=(), create=True):
+    """TextFeatures for one string, or None for empty text"""
+    if not text:
+        return None
+    clean = clean_text(text)
+    words = set(clean.split())
+    keywords = keyword_tokens(text)
+    ids = intern_tokens(conn, words | keywords, create=create)
+    return TextFeatures(
+        clean,
+        frozenset(ids[word] for word in words),
+        frozenset(ids[word] for word in keywords),
+        frozenset(tags)
+    )
+
+def pack_ids(ids):
+    """Sorted int32 array bytes for storage"""
+    return array('i', sorted(ids)).tobytes()
+
+def unpack_ids(blob):
+    ids = array('i')
+    ids.frombytes(blob or b'')
+    return frozenset(ids)
+
+def store_report_text(conn, report_id, texts, tags=None):
+    """Compute and persist features for a report
+
+    `texts` maps field name -> raw string, `tags` maps field name -> labels.
+    """
+    tags = tags or {}
+    conn.execute("DELETE FROM report_text WHERE report_id = ?", (report_id,))
+    features = {}
+    for field, text in texts.items():
+        feature = build_text_features(conn, text, tags.get(field, ()))
+        features[field] = feature
+        if feature is None:
+            continue
+        conn.execute("""
+            INSERT INTO report_text (report_id, field, clean_text, token_ids, keyword_ids, tags)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (
+            report_id,
+            field,
+            feature.clean,
+            pack_ids(feature.token_ids),
+            pack_ids(feature.keyword_ids),
+            ' '.join(sorted(feature.tags))
+        ))
+    return features
+
+def load_report_texts(conn, report_ids, fields):
+    """{report_id: {field: TextFeatures or None}} for reports that have features
+
+    Fields that were never stored (empty text) come back as None; reports
+    with no stored features at all are left out.
+    """
+    texts = {}
+    rows = select_in(conn, """
+        SELECT report_id, field, clean_text, token_ids, keyword_ids, tags
+        FROM report_text WHERE report_id IN ({placeholders})
+    """, report_ids)
+    for report_id, field, clean, token_ids, keyword_ids, tags in rows:
+        report_texts = texts.setdefault(report_id, dict.fromkeys(fields))
+        if field in report_texts:
+            report_texts[field] = TextFeatures(
+                clean,
+                unpack_ids(token_ids),
+                unpack_ids(keyword_ids),
+                frozenset(tags.split())
+            )
+    return texts
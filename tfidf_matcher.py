@@ -0,0 +1,82 @@
+# Vectorized TF-IDF scoring for /enhanced_matches
+# Item names and descriptions of the active corpus are turned into sparse
+# TF-IDF matrices once, and all lost x found cosine scores come out of a
+# sparse matrix product computed a block of lost rows at a time.
+# Requires: pip install numpy scipy
+
+import math
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = None
+    sparse = None
+
+NAME_WEIGHT = 0.4
+DESCRIPTION_WEIGHT = 0.4
+LOCATION_WEIGHT = 0.2
+
+def tfidf_available():
+    return np is not None and sparse is not None
+
+def tfidf_matrix(documents, columns, idf):
+    """L2-normalized binary TF-IDF rows for documents given as token id sets"""
+    indptr = [0]
+    indices = []
+    data = []
+    for tokens in documents:
+        row = [columns[token] for token in tokens or () if token in columns]
+        weights = [idf[column] for column in row]
+        norm = math.sqrt(sum(weight * weight for weight in weights)) or 1.0
+        indices.extend(row)
+        data.extend(weight / norm for weight in weights)
+        indptr.append(len(indices))
+    return sparse.csr_matrix(
+        (np.array(data, dtype=np.float64), np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+        shape=(len(documents), len(columns))
+    )
+
+def build_field_matrices(lost_docs, found_docs):
+    """TF-IDF matrices for one field, with IDF taken over lost and found together"""
+    document_frequency = {}
+    for tokens in list(lost_docs) + list(found_docs):
+        for token in tokens or ():
+            document_frequency[token] = document_frequency.get(token, 0) + 1
+
+    columns = {token: column for column, token in enumerate(document_frequency)}
+    total = len(lost_docs) + len(found_docs)
+    # Smoothed IDF, as scikit-learn computes it
+    idf = [math.log((1 + total) / (1 + document_frequency[token])) + 1 for token in columns]
+    return tfidf_matrix(lost_docs, columns, idf), tfidf_matrix(found_docs, columns, idf)
+
+def tfidf_pair_scores(lost_names, lost_descriptions, found_names, found_descriptions,
+                      threshold=0.3, block_size=512):
+    """Yield (lost_index, found_index, name_score, description_score) per block
+
+    Only pairs whose weighted name + description score could still clear
+    `threshold` with a perfect location score are yielded, so the caller
+    only has to evaluate location similarity on those.
+    """
+    lost_name_matrix, found_name_matrix = build_field_matrices(lost_names, found_names)
+    lost_desc_matrix, found_desc_matrix = build_field_matrices(lost_descriptions, found_descriptions)
+    found_name_t = found_name_matrix.T.tocsr()
+    found_desc_t = found_desc_matrix.T.tocsr()
+    text_cutoff = threshold - LOCATION_WEIGHT
+
+    for start in range(0, len(lost_names), block_size):
+        stop = min(start + block_size, len(lost_names))
+        name_block = (lost_name_matrix[start:stop] @ found_name_t).tocsr()
+        desc_block = (lost_desc_matrix[start:stop] @ found_desc_t).tocsr()
+        combined = (name_block * NAME_WEIGHT + desc_block * DESCRIPTION_WEIGHT).tocoo()
+
+        keep = combined.data > text_cutoff
+        rows = combined.row[keep]
+        cols = combined.col[keep]
+        if not len(rows):
+            continue
+        name_scores = np.asarray(name_block[rows, cols]).ravel()
+        desc_scores = np.asarray(desc_block[rows, cols]).ravel()
+        for row, col, name_score, desc_score in zip(rows.tolist(), cols.tolist(),
+                                                    name_scores.tolist(), desc_scores.tolist()):
+            yield start + row, col, name_score, desc_score
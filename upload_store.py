@@ -0,0 +1,61 @@
+# Content-addressed upload store
+# Uploads are streamed to disk through SHA-256 in one pass and stored as
+# <sha256>.<extension>, so identical images share one file. The uploads table
+# maps each digest to its stored file, which makes duplicate detection a
+# primary-key lookup instead of re-reading every stored image.
+
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+from datetime import datetime
+from werkzeug.utils import secure_filename
+
+CHUNK_SIZE = 64 * 1024
+
+# filename: stored name under the upload folder
+# sha256: hex digest of the content
+# duplicate: the same content had already been uploaded
+StoredUpload = namedtuple('StoredUpload', ['filename', 'sha256', 'size', 'duplicate'])
+
+def upload_extension(filename):
+    filename = secure_filename(filename)
+    return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
+
+def save_upload(conn, file, folder):
+    """Stream a werkzeug FileStorage into the store and return its StoredUpload"""
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=folder, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                chunk = file.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+        sha256 = digest.hexdigest()
+
+        existing = conn.execute("SELECT filename FROM uploads WHERE sha256 = ?", (sha256,)).fetchone()
+        if existing and os.path.exists(os.path.join(folder, existing[0])):
+            os.remove(temp_path)
+            return StoredUpload(existing[0], sha256, size, True)
+
+        extension = upload_extension(file.filename)
+        filename = f'{sha256}.{extension}' if extension else sha256
+        os.replace(temp_path, os.path.join(folder, filename))
+        conn.execute("""
+            INSERT OR REPLACE INTO uploads (sha256, filename, size, created_at) VALUES (?, ?, ?, ?)
+        """, (sha256, filename, size, datetime.now()))
+        return StoredUpload(filename, sha256, size, False)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def find_upload(conn, sha256):
+    """Stored filename for a content digest, or None"""
+    row = conn.execute("SELECT filename FROM uploads WHERE sha256 = ?", (sha256,)).fetchone()
+    return row[0] if row else None